@@ -5,42 +5,555 @@ Provides high-quality document conversion using the Marker OCR engine.
 import os
 import sys
 import logging
+from logging.handlers import QueueHandler, QueueListener
 import asyncio
+import functools
+import gzip
+import hashlib
+import multiprocessing
+import mimetypes
+import queue
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from typing import Dict, Any, Optional, List
-from pathlib import Path
-import uuid
+from uuid import uuid4
 from datetime import datetime
 
+import orjson
+
 # FastAPI imports
-from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Response, status, BackgroundTasks
+from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Request, Response, status, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, FileResponse
 
 # Import Marker OCR wrapper
-from marker_wrapper import MarkerOCR
+from marker_wrapper import MarkerOCR, SUPPORTED_EXTENSIONS, GPU_PROCESSES_ENV
 
-# Create app
-app = FastAPI(
-    title="Marker OCR Server",
-    description="High-quality document conversion server using Marker OCR",
-    version="2.0.0"
-)
+# Session directories live under outputs/; paths are kept as plain strings
+OUTPUTS_DIR = "outputs"
 
-# Setup logging
+# Ensure directories exist
+os.makedirs("logs", exist_ok=True)
+os.makedirs("uploads", exist_ok=True)
+os.makedirs(OUTPUTS_DIR, exist_ok=True)
+
+# Setup logging; records are handed to a background listener thread so
+# request handlers never block on console or file writes
+log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+log_listener = QueueListener(
+    log_queue,
+    logging.StreamHandler(sys.stdout),
+    logging.FileHandler("logs/marker_ocr_server.log"),
+    respect_handler_level=True
+)
+# force=True because importing marker_wrapper already configured the root logger
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler("logs/marker_ocr_server.log")
-    ]
+    handlers=[QueueHandler(log_queue)],
+    force=True
 )
+log_listener.start()
 logger = logging.getLogger("marker_ocr_server")
 
-# Ensure directories exist
-os.makedirs("logs", exist_ok=True)
-os.makedirs("uploads", exist_ok=True)
-os.makedirs("outputs", exist_ok=True)
+# Marker OCR engine for this process; each worker process imports this
+# module and loads its own models, so the server process stays model-free
+ocr_engine = MarkerOCR()
+
+# Maximum number of OCR worker processes
+OCR_WORKERS = min(os.cpu_count() or 1, int(os.environ.get("OCR_WORKERS", "2")))
+
+# Each worker holds its own models; spawned workers inherit this and size
+# their GPU batches for a share of free VRAM
+os.environ.setdefault(GPU_PROCESSES_ENV, str(OCR_WORKERS))
+
+# OCR is CPU/GPU bound, so conversions run in worker processes to keep
+# the event loop free for health checks, downloads and session queries.
+# The pool is created and warmed up by the app lifespan.
+ocr_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _init_ocr_worker():
+    """Load Marker's models once per worker so every job reuses them."""
+    ocr_engine.is_ready()
+
+
+def _ocr_worker_ready() -> bool:
+    """Report whether a worker's engine is usable (used to start workers eagerly)."""
+    return ocr_engine.is_ready()
+
+
+def _run_conversion(**kwargs) -> Dict[str, Any]:
+    """Run a conversion inside a worker process."""
+    return ocr_engine.convert_pdf(**kwargs)
+
+
+def _worker_mp_context():
+    """Spawn workers; models live on the GPU and CUDA cannot be used after fork."""
+    return multiprocessing.get_context("spawn")
+
+
+# Uploads are streamed to disk in chunks of this size (1 MiB)
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Largest accepted upload (default 100 MiB)
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", str(100 << 20)))
+
+# Downloads are read in chunks of this size (1 MiB) when the server does
+# not support zero-copy file sends
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+
+class LargeChunkFileResponse(FileResponse):
+    """FileResponse that streams large OCR outputs in bigger chunks."""
+    chunk_size = DOWNLOAD_CHUNK_SIZE
+
+
+# Copy buffers for in-memory uploads are pooled and reused across requests
+# instead of allocating fresh bytes objects for every chunk
+upload_buffers: "queue.SimpleQueue[bytearray]" = queue.SimpleQueue()
+
+
+def acquire_upload_buffer() -> bytearray:
+    """Take a copy buffer from the pool, allocating one if it is empty."""
+    try:
+        return upload_buffers.get_nowait()
+    except queue.Empty:
+        return bytearray(UPLOAD_CHUNK_SIZE)
+
+
+def release_upload_buffer(buf: bytearray):
+    """Return a copy buffer to the pool, keeping at most two per concurrent job."""
+    if upload_buffers.qsize() < 2 * OCR_CONCURRENCY:
+        upload_buffers.put(buf)
+
+
+def save_upload(src, destination: str) -> int:
+    """
+    Copy an upload's spooled body to disk without re-buffering it in Python.
+    
+    Uploads that already spilled to a temporary file are copied in-kernel with
+    sendfile; small in-memory uploads are written straight from the spool.
+    The destination is preallocated so the filesystem reserves its extents in
+    one call rather than growing the file write by write.
+    
+    Returns:
+        Number of bytes written
+    """
+    size = src.seek(0, os.SEEK_END)
+    src.seek(0)
+    with open(destination, "wb", buffering=UPLOAD_CHUNK_SIZE) as dst:
+        if size and hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(dst.fileno(), 0, size)
+            except OSError:
+                pass  # Not supported by this filesystem
+        
+        if getattr(src, "_rolled", True) and hasattr(os, "sendfile"):
+            in_fd, out_fd = src.fileno(), dst.fileno()
+            offset = 0
+            while sent := os.sendfile(out_fd, in_fd, offset, 1 << 30):
+                offset += sent
+            return offset
+        
+        buf = acquire_upload_buffer()
+        try:
+            with memoryview(buf) as view:
+                while n := src.readinto(buf):
+                    dst.write(view[:n])
+        finally:
+            release_upload_buffer(buf)
+        return dst.tell()
+
+
+def hash_upload(src) -> str:
+    """BLAKE2b digest of an upload's spooled body, read through a pooled buffer."""
+    digest = hashlib.blake2b(digest_size=16)
+    src.seek(0)
+    buf = acquire_upload_buffer()
+    try:
+        with memoryview(buf) as view:
+            while n := src.readinto(buf):
+                digest.update(view[:n])
+    finally:
+        release_upload_buffer(buf)
+    src.seek(0)
+    return digest.hexdigest()
+
+
+def drop_page_cache(path: str):
+    """Tell the kernel a single-use file's cached pages can be dropped (Linux only)."""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+# Text outputs get a gzip sidecar so downloads need no per-request compression
+PRECOMPRESS_EXTENSIONS = frozenset({".md", ".html", ".json", ".txt"})
+
+
+def precompress_outputs(paths: List[Optional[str]]):
+    """Write a gzip-encoded copy (path + ".gz") next to each text output."""
+    for path in paths:
+        if not path or os.path.splitext(path)[1].lower() not in PRECOMPRESS_EXTENSIONS:
+            continue
+        tmp_path = path + ".gz.tmp"
+        try:
+            with open(path, "rb") as src, open(tmp_path, "wb") as raw, \
+                    gzip.GzipFile(os.path.basename(path), "wb", 9, raw) as dst:
+                shutil.copyfileobj(src, dst, UPLOAD_CHUNK_SIZE)
+            os.replace(tmp_path, path + ".gz")
+        except OSError as e:
+            logger.warning(f"Could not precompress {path}: {str(e)}")
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+
+@functools.lru_cache(maxsize=256)
+def guess_media_type(filename: str) -> str:
+    """Guess the media type of a download from its file name."""
+    return mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+
+# Number of conversion jobs consumed from the queue concurrently
+OCR_CONCURRENCY = int(os.environ.get("OCR_CONCURRENCY", str(OCR_WORKERS)))
+
+# In-memory job tracking and the queue feeding the conversion workers
+jobs: Dict[str, Dict[str, Any]] = {}
+job_queue: asyncio.Queue = asyncio.Queue()
+worker_tasks: List[asyncio.Task] = []
+
+# Session directories are capped by count and total size; the least recently
+# used sessions are deleted once either limit is exceeded
+MAX_SESSIONS = int(os.environ.get("MAX_SESSIONS", "500"))
+MAX_SESSION_BYTES = int(os.environ.get("MAX_SESSION_BYTES", str(10 << 30)))
+
+
+@dataclass(slots=True)
+class SessionMeta:
+    """Bookkeeping for a session directory under outputs/."""
+    path: str
+    size: int = 0
+    modified: float = field(default_factory=time.time)
+    upload_key: Optional[str] = None
+
+
+sessions: "OrderedDict[str, SessionMeta]" = OrderedDict()
+sessions_lock = threading.Lock()
+
+# Upload digest plus conversion options -> session that converted it; entries
+# live exactly as long as their session, so the map shares the session limits
+upload_sessions: Dict[str, str] = {}
+
+# Rolling total of all tracked session sizes, kept in step with `sessions`
+sessions_total_bytes = 0
+
+
+def _evict_sessions_locked(keep_id: str) -> List[str]:
+    """Evict least recently used sessions over the limits; caller holds the lock."""
+    global sessions_total_bytes
+    evicted = []
+    for sid in list(sessions):
+        if len(sessions) <= MAX_SESSIONS and sessions_total_bytes <= MAX_SESSION_BYTES:
+            break
+        if sid == keep_id or jobs.get(sid, {}).get("status") in ("queued", "processing"):
+            continue
+        old = sessions.pop(sid)
+        sessions_total_bytes -= old.size
+        _forget_upload_key_locked(sid, old)
+        jobs.pop(sid, None)
+        evicted.append(old.path)
+    return evicted
+
+
+def _forget_upload_key_locked(session_id: str, meta: SessionMeta):
+    """Drop a session's deduplication entry; caller holds the lock."""
+    if meta.upload_key and upload_sessions.get(meta.upload_key) == session_id:
+        del upload_sessions[meta.upload_key]
+
+
+def register_session(session_id: str, meta: SessionMeta) -> List[str]:
+    """
+    Record a session as most recently used and evict sessions over the limits.
+    
+    Sessions with a queued or running job are never evicted.
+    
+    Returns:
+        Directories of the evicted sessions, to be deleted by the caller
+    """
+    global sessions_total_bytes
+    with sessions_lock:
+        previous = sessions.pop(session_id, None)
+        if previous:
+            sessions_total_bytes -= previous.size
+            _forget_upload_key_locked(session_id, previous)
+        sessions[session_id] = meta
+        sessions_total_bytes += meta.size
+        if meta.upload_key:
+            upload_sessions[meta.upload_key] = session_id
+        return _evict_sessions_locked(session_id)
+
+
+def update_session_size(session_id: str, size: int) -> List[str]:
+    """Record a session's size after its outputs were written; returns evicted directories."""
+    global sessions_total_bytes
+    with sessions_lock:
+        meta = sessions.get(session_id)
+        if meta is None:
+            return []
+        sessions_total_bytes += size - meta.size
+        meta.size = size
+        meta.modified = time.time()
+        return _evict_sessions_locked(session_id)
+
+
+def touch_session(session_id: str):
+    """Mark a session as recently used."""
+    with sessions_lock:
+        if session_id in sessions:
+            sessions.move_to_end(session_id)
+
+
+def forget_session(session_id: str):
+    """Stop tracking a session."""
+    global sessions_total_bytes
+    with sessions_lock:
+        meta = sessions.pop(session_id, None)
+        if meta:
+            sessions_total_bytes -= meta.size
+            _forget_upload_key_locked(session_id, meta)
+
+
+def find_duplicate_session(upload_key: str) -> Optional[str]:
+    """
+    Find a session that already converted the same upload with the same options.
+    
+    Sessions whose job failed or is no longer tracked are not reused.
+    
+    Returns:
+        The matching session ID, marked as recently used, or None
+    """
+    with sessions_lock:
+        session_id = upload_sessions.get(upload_key)
+        if session_id is None:
+            return None
+        if jobs.get(session_id, {}).get("status") not in ("queued", "processing", "completed"):
+            del upload_sessions[upload_key]
+            return None
+        sessions.move_to_end(session_id)
+        return session_id
+
+
+def session_path(session_id: str) -> str:
+    """Directory holding a session's upload and outputs."""
+    return f"{OUTPUTS_DIR}/session_{session_id}"
+
+
+def directory_size(path: str) -> int:
+    """Total size of the files below a directory."""
+    total = 0
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                total += directory_size(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                total += entry.stat(follow_symlinks=False).st_size
+    return total
+
+
+def remove_session_dirs(paths: List[str]):
+    """Delete evicted session directories."""
+    for path in paths:
+        shutil.rmtree(path, ignore_errors=True)
+        logger.info(f"Evicted session directory {os.path.basename(path)}")
+
+
+def load_existing_sessions() -> List[str]:
+    """Track session directories left over from previous runs, oldest first."""
+    with os.scandir(OUTPUTS_DIR) as entries:
+        session_dirs = [
+            (entry.stat().st_mtime, entry.name, entry.path)
+            for entry in entries
+            if entry.name.startswith("session_") and entry.is_dir()
+        ]
+    session_dirs.sort()
+    
+    evicted = []
+    for mtime, name, session_dir in session_dirs:
+        session_id = name[len("session_"):]
+        meta = SessionMeta(session_dir, directory_size(session_dir), mtime)
+        evicted.extend(register_session(session_id, meta))
+    return evicted
+
+
+async def conversion_worker():
+    """Consume queued conversion jobs and run them in the OCR worker pool."""
+    loop = asyncio.get_running_loop()
+    while True:
+        session_id, options = await job_queue.get()
+        job = jobs.get(session_id)
+        if job is None:
+            # Session deleted or evicted while its job was queued
+            job_queue.task_done()
+            continue
+        filename = job["filename"]
+        job["status"] = "processing"
+        job["started_at"] = datetime.now().isoformat()
+        try:
+            logger.info(f"Processing {filename} with Marker OCR (Session: {session_id})")
+            result = await loop.run_in_executor(
+                ocr_executor,
+                functools.partial(_run_conversion, **options)
+            )
+            
+            if result['success']:
+                response_data = {
+                    "success": True,
+                    "session_id": session_id,
+                    "filename": filename,
+                    "output_format": options["output_format"],
+                    "processing_time": result.get('processing_time', 'N/A'),
+                    "pages_processed": result.get('pages_processed', 'N/A'),
+                    "markdown_file": result.get('markdown_file'),
+                    "json_file": result.get('json_file'),
+                    "html_file": result.get('html_file'),
+                    "images_extracted": len(result.get('images', [])),
+                    "metadata": result.get('metadata', {})
+                }
+                
+                # Add text content if available
+                if 'text' in result:
+                    response_data['text'] = result['text']
+                
+                job.update({
+                    "status": "completed",
+                    "completed_at": datetime.now().isoformat(),
+                    "result": response_data
+                })
+                logger.info(f"Successfully processed {filename}")
+                
+                await loop.run_in_executor(None, precompress_outputs, [
+                    result.get('markdown_file'), result.get('json_file'), result.get('html_file')
+                ])
+                
+                # Size the session once now that its outputs exist
+                size = await loop.run_in_executor(None, directory_size, options["output_dir"])
+                evicted = update_session_size(session_id, size)
+                if evicted:
+                    await loop.run_in_executor(None, remove_session_dirs, evicted)
+            else:
+                job.update({
+                    "status": "failed",
+                    "error": f"Conversion failed: {result.get('error', 'Unknown error')}",
+                    "failed_at": datetime.now().isoformat()
+                })
+                logger.error(f"Failed to process {filename}: {result.get('error')}")
+        
+        except Exception as e:
+            job.update({
+                "status": "failed",
+                "error": f"Processing error: {str(e)}",
+                "failed_at": datetime.now().isoformat()
+            })
+            logger.error(f"Error processing {filename}: {str(e)}")
+        finally:
+            # The upload has been consumed; keep it from crowding the page cache
+            await loop.run_in_executor(None, drop_page_cache, options["pdf_path"])
+            job_queue.task_done()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the OCR worker pool and warm up its models, then run the conversion workers."""
+    global ocr_executor
+    loop = asyncio.get_running_loop()
+    
+    ocr_executor = ProcessPoolExecutor(
+        max_workers=OCR_WORKERS,
+        mp_context=_worker_mp_context(),
+        initializer=_init_ocr_worker
+    )
+    
+    # Start every worker now so model loading doesn't delay the first jobs
+    await asyncio.gather(*(
+        loop.run_in_executor(ocr_executor, _ocr_worker_ready) for _ in range(OCR_WORKERS)
+    ))
+    
+    evicted = await loop.run_in_executor(None, load_existing_sessions)
+    await loop.run_in_executor(None, remove_session_dirs, evicted)
+    
+    for _ in range(OCR_CONCURRENCY):
+        worker_tasks.append(asyncio.create_task(conversion_worker()))
+    
+    yield
+    
+    for task in worker_tasks:
+        task.cancel()
+    ocr_executor.shutdown(wait=False, cancel_futures=True)
+    log_listener.stop()
+
+
+# Static responses are serialized once at import
+_ROOT_JSON = orjson.dumps({
+    "message": "Marker OCR Server",
+    "version": "2.0.0",
+    "description": "High-quality document conversion using Marker OCR",
+    "supported_formats": [
+        "PDF", "JPEG", "PNG", "WebP", "TIFF", "BMP",
+        "DOCX", "PPTX", "XLSX", "EPUB", "MOBI", "HTML"
+    ],
+    "output_formats": ["markdown", "json", "html"],
+    "status": "ready"
+})
+
+_FORMATS_JSON = orjson.dumps({
+    "input_formats": {
+        "pdf": "PDF documents (recommended)",
+        "images": ["JPEG", "PNG", "WebP", "TIFF", "BMP"],
+        "office": ["DOCX", "PPTX", "XLSX"],
+        "ebooks": ["EPUB", "MOBI"],
+        "web": ["HTML"]
+    },
+    "output_formats": {
+        "markdown": "Clean markdown with preserved structure",
+        "json": "Structured JSON with metadata",
+        "html": "HTML with styling and formatting",
+        "both": "Multiple formats simultaneously"
+    },
+    "features": [
+        "Table detection and conversion",
+        "Mathematical equation preservation",
+        "Image extraction",
+        "Multi-language support (90+ languages)",
+        "Batch processing",
+        "Custom page ranges"
+    ]
+})
+
+
+# Create app
+app = FastAPI(
+    title="Marker OCR Server",
+    description="High-quality document conversion server using Marker OCR",
+    version="2.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
 
 # Add CORS middleware
 app.add_middleware(
@@ -51,37 +564,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize Marker OCR
-ocr_engine = MarkerOCR()
+# Compress JSON and text responses (job results embed the full OCR text)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
 
 @app.get("/")
 async def root():
     """Root endpoint with server information."""
-    return {
-        "message": "Marker OCR Server",
-        "version": "2.0.0",
-        "description": "High-quality document conversion using Marker OCR",
-        "supported_formats": [
-            "PDF", "JPEG", "PNG", "WebP", "TIFF", "BMP",
-            "DOCX", "PPTX", "XLSX", "EPUB", "MOBI", "HTML"
-        ],
-        "output_formats": ["markdown", "json", "html"],
-        "status": "ready"
-    }
+    return Response(content=_ROOT_JSON, media_type="application/json")
 
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {
-        "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
-        "marker_available": True
-    }
+    return Response(
+        content=b'{"status":"healthy","timestamp":"' + datetime.now().isoformat().encode()
+        + b'","marker_available":true}',
+        media_type="application/json"
+    )
 
 
-@app.post("/convert")
+@app.post("/convert", status_code=status.HTTP_202_ACCEPTED)
 async def convert_document(
     file: UploadFile = File(...),
     output_format: str = Form(default="markdown"),
@@ -90,7 +593,7 @@ async def convert_document(
     language: str = Form(default="en")
 ):
     """
-    Convert uploaded document using Marker OCR.
+    Queue an uploaded document for conversion with Marker OCR.
     
     Args:
         file: Document file to convert
@@ -100,109 +603,173 @@ async def convert_document(
         language: Document language code
     
     Returns:
-        JSON response with conversion results
+        JSON response with the queued job; poll /sessions/{session_id}/status for results
     """
     try:
+        # Reject uploads Marker can't handle before touching the session directory
+        extension = os.path.splitext(file.filename)[1].lower()
+        if extension not in SUPPORTED_EXTENSIONS:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail=f"Unsupported file format: {extension or file.filename}"
+            )
+        if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File too large: {file.size} bytes (limit {MAX_UPLOAD_BYTES})"
+            )
+        
+        # Resubmitted documents reuse the session that already converted them
+        loop = asyncio.get_running_loop()
+        digest = await loop.run_in_executor(None, hash_upload, file.file)
+        upload_key = f"{digest}:{output_format}:{extract_images}:{max_pages}:{language}"
+        duplicate_id = find_duplicate_session(upload_key)
+        if duplicate_id is not None:
+            logger.info(f"Reusing session {duplicate_id} for duplicate upload {file.filename}")
+            return {**jobs[duplicate_id], "deduplicated": True}
+        
         # Generate unique session ID
-        session_id = str(uuid.uuid4())
+        session_id = uuid4().hex
         
         # Create session directory
-        session_dir = Path("outputs") / f"session_{session_id}"
-        session_dir.mkdir(exist_ok=True)
+        session_dir = session_path(session_id)
+        os.mkdir(session_dir)
         
-        # Save uploaded file
-        input_file = session_dir / file.filename
-        with open(input_file, "wb") as f:
-            content = await file.read()
-            f.write(content)
+        # Copy the upload straight from its spool; Marker needs a file on disk
+        input_file = os.path.join(session_dir, file.filename)
+        upload_size = await loop.run_in_executor(None, save_upload, file.file, input_file)
         
-        logger.info(f"Processing {file.filename} with Marker OCR (Session: {session_id})")
+        jobs[session_id] = {
+            "session_id": session_id,
+            "status": "queued",
+            "filename": file.filename,
+            "output_format": output_format,
+            "queued_at": datetime.now().isoformat()
+        }
+        await job_queue.put((session_id, {
+            "pdf_path": input_file,
+            "output_dir": session_dir,
+            "output_format": output_format,
+            "extract_images": extract_images,
+            "max_pages": max_pages,
+            "language": language
+        }))
         
-        # Process with Marker OCR
-        result = ocr_engine.convert_pdf(
-            pdf_path=str(input_file),
-            output_dir=str(session_dir),
-            output_format=output_format,
-            extract_images=extract_images,
-            max_pages=max_pages,
-            language=language
+        # Track the new session and drop the least recently used ones
+        evicted = register_session(
+            session_id, SessionMeta(session_dir, upload_size, upload_key=upload_key)
         )
+        if evicted:
+            await loop.run_in_executor(None, remove_session_dirs, evicted)
         
-        if result['success']:
-            response_data = {
-                "success": True,
-                "session_id": session_id,
-                "filename": file.filename,
-                "output_format": output_format,
-                "processing_time": result.get('processing_time', 'N/A'),
-                "pages_processed": result.get('pages_processed', 'N/A'),
-                "markdown_file": result.get('markdown_file'),
-                "json_file": result.get('json_file'),
-                "html_file": result.get('html_file'),
-                "images_extracted": len(result.get('images', [])),
-                "metadata": result.get('metadata', {})
-            }
-            
-            # Add text content if available
-            if 'text' in result:
-                response_data['text'] = result['text']
-            
-            logger.info(f"Successfully processed {file.filename}")
-            return JSONResponse(content=response_data)
-        else:
-            logger.error(f"Failed to process {file.filename}: {result.get('error')}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"Conversion failed: {result.get('error', 'Unknown error')}"
-            )
+        logger.info(f"Queued {file.filename} for Marker OCR (Session: {session_id})")
+        return jobs[session_id]
     
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error processing {file.filename}: {str(e)}")
+        logger.error(f"Error queueing {file.filename}: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Processing error: {str(e)}"
         )
 
 
+@app.get("/sessions/{session_id}/status")
+async def get_job_status(session_id: str):
+    """Get the conversion status (and result once completed) for a session."""
+    if session_id not in jobs:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    touch_session(session_id)
+    return jobs[session_id]
+
+
 @app.get("/download/{session_id}/{filename}")
-async def download_file(session_id: str, filename: str):
-    """Download processed file from session."""
+async def download_file(session_id: str, filename: str, request: Request):
+    """Download processed file from session, gzip-encoded when a sidecar exists."""
     try:
-        file_path = Path("outputs") / f"session_{session_id}" / filename
+        file_path = os.path.join(session_path(session_id), filename)
+        headers = None
         
-        if not file_path.exists():
+        # A single stat serves both the existence check and the response
+        # headers (Content-Length, Last-Modified, ETag, Range handling)
+        try:
+            stat_result = None
+            if os.path.splitext(filename)[1].lower() in PRECOMPRESS_EXTENSIONS:
+                headers = {"Vary": "Accept-Encoding"}
+                if "gzip" in request.headers.get("accept-encoding", ""):
+                    try:
+                        stat_result = os.stat(file_path + ".gz")
+                        file_path += ".gz"
+                        headers["Content-Encoding"] = "gzip"
+                    except FileNotFoundError:
+                        pass
+            if stat_result is None:
+                stat_result = os.stat(file_path)
+        except FileNotFoundError:
             raise HTTPException(status_code=404, detail="File not found")
         
-        return FileResponse(
-            path=str(file_path),
+        touch_session(session_id)
+        return LargeChunkFileResponse(
+            path=file_path,
             filename=filename,
-            media_type='application/octet-stream'
+            media_type=guess_media_type(filename),
+            headers=headers,
+            stat_result=stat_result
         )
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error downloading file: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/sessions")
+async def list_sessions():
+    """List tracked sessions from the in-memory index, without walking outputs/."""
+    with sessions_lock:
+        session_list = [
+            {
+                "session_id": sid,
+                "size": meta.size,
+                "modified": datetime.fromtimestamp(meta.modified).isoformat(),
+                "status": jobs.get(sid, {}).get("status")
+            }
+            for sid, meta in sessions.items()
+        ]
+        total_bytes = sessions_total_bytes
+    
+    return {
+        "sessions": session_list,
+        "total": len(session_list),
+        "total_bytes": total_bytes
+    }
+
+
 @app.get("/sessions/{session_id}")
 async def get_session_info(session_id: str):
     """Get information about a processing session."""
     try:
-        session_dir = Path("outputs") / f"session_{session_id}"
+        session_dir = session_path(session_id)
         
-        if not session_dir.exists():
+        if not os.path.isdir(session_dir):
             raise HTTPException(status_code=404, detail="Session not found")
         
-        files = list(session_dir.iterdir())
-        file_info = []
+        touch_session(session_id)
         
-        for file_path in files:
-            if file_path.is_file():
-                file_info.append({
-                    "name": file_path.name,
-                    "size": file_path.stat().st_size,
-                    "modified": datetime.fromtimestamp(file_path.stat().st_mtime).isoformat()
-                })
+        # One scandir pass; DirEntry caches the file type and stat result
+        file_info = []
+        with os.scandir(session_dir) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False) and not entry.name.endswith(".gz"):
+                    st = entry.stat(follow_symlinks=False)
+                    file_info.append({
+                        "name": entry.name,
+                        "size": st.st_size,
+                        "modified": datetime.fromtimestamp(st.st_mtime).isoformat()
+                    })
         
         return {
             "session_id": session_id,
@@ -210,25 +777,33 @@ async def get_session_info(session_id: str):
             "total_files": len(file_info)
         }
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting session info: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.delete("/sessions/{session_id}")
-async def cleanup_session(session_id: str):
-    """Clean up session files."""
+@app.delete("/sessions/{session_id}", status_code=status.HTTP_202_ACCEPTED)
+async def cleanup_session(session_id: str, background_tasks: BackgroundTasks):
+    """Clean up session files; the directory is removed after the response is sent."""
     try:
-        session_dir = Path("outputs") / f"session_{session_id}"
+        session_dir = session_path(session_id)
         
-        if session_dir.exists():
-            import shutil
-            shutil.rmtree(session_dir)
-            logger.info(f"Cleaned up session {session_id}")
-            return {"message": f"Session {session_id} cleaned up successfully"}
+        if os.path.isdir(session_dir):
+            # The job still needs its upload and output directory
+            if jobs.get(session_id, {}).get("status") in ("queued", "processing"):
+                raise HTTPException(status_code=409, detail="Session is still being processed")
+            jobs.pop(session_id, None)
+            forget_session(session_id)
+            background_tasks.add_task(shutil.rmtree, session_dir, ignore_errors=True)
+            logger.info(f"Scheduled cleanup of session {session_id}")
+            return {"message": f"Session {session_id} scheduled for cleanup"}
         else:
             raise HTTPException(status_code=404, detail="Session not found")
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error cleaning up session: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -237,39 +812,22 @@ async def cleanup_session(session_id: str):
 @app.get("/formats")
 async def get_supported_formats():
     """Get information about supported input and output formats."""
-    return {
-        "input_formats": {
-            "pdf": "PDF documents (recommended)",
-            "images": ["JPEG", "PNG", "WebP", "TIFF", "BMP"],
-            "office": ["DOCX", "PPTX", "XLSX"],
-            "ebooks": ["EPUB", "MOBI"],
-            "web": ["HTML"]
-        },
-        "output_formats": {
-            "markdown": "Clean markdown with preserved structure",
-            "json": "Structured JSON with metadata",
-            "html": "HTML with styling and formatting",
-            "both": "Multiple formats simultaneously"
-        },
-        "features": [
-            "Table detection and conversion",
-            "Mathematical equation preservation",
-            "Image extraction",
-            "Multi-language support (90+ languages)",
-            "Batch processing",
-            "Custom page ranges"
-        ]
-    }
+    return Response(content=_FORMATS_JSON, media_type="application/json")
 
 
 if __name__ == "__main__":
     import uvicorn
     
-    # Run server
+    # Run server on uvloop/httptools (installed with uvicorn[standard]).
+    # Jobs and sessions are tracked in process memory, so keep a single
+    # worker unless requests are pinned to workers by a sticky proxy.
     uvicorn.run(
         "marker_ocr_server:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
-        log_level="info"
+        reload=False,
+        log_level="info",
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.environ.get("UVICORN_WORKERS", "1"))
     )
\ No newline at end of file
@@ -16,107 +16,980 @@ Features:
 
 import os
 import sys
+import asyncio
 import json
 import logging
 from pathlib import Path
-from typing import Optional, Dict, Any, List, Union
+from typing import Optional, Dict, Any, Iterator, List, Set, Tuple, Union
 import tempfile
 import shutil
+import subprocess
+import importlib.util
+import itertools
+import select
+import mmap
+import threading
+import time
+import contextlib
+import functools
+import multiprocessing
+from collections import OrderedDict, deque
+from concurrent.futures import (
+    FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+)
+from concurrent.futures.process import BrokenProcessPool
+
+# orjson parses and serializes JSON several times faster than json; optional here
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("marker_wrapper")
 
-# Check if Marker is available
-try:
-    import marker
-    import subprocess
-    # Test CLI availability
-    result = subprocess.run(['marker_single', '--help'], 
-                          capture_output=True, text=True, timeout=5)
-    if result.returncode == 0:
-        MARKER_AVAILABLE = True
-        logger.info("✓ Marker OCR is available (CLI)")
-    else:
-        MARKER_AVAILABLE = False
-        logger.warning("⚠️ Marker CLI not responding")
-except Exception as e:
-    MARKER_AVAILABLE = False
-    logger.warning(f"⚠️ Marker OCR not available: {e}")
+# Marker availability, checked once per process; None until checked
+_MARKER_AVAILABLE: Optional[bool] = None
+
+
+def _check_marker_once() -> bool:
+    """Check whether Marker is installed with an import, without spawning the CLI."""
+    global _MARKER_AVAILABLE
+    if _MARKER_AVAILABLE is not None:
+        return _MARKER_AVAILABLE
+    
+    try:
+        import marker
+        _MARKER_AVAILABLE = True
+        logger.info("✓ Marker OCR is available")
+        if shutil.which('marker_single') is None:
+            logger.warning("⚠️ marker_single not on PATH; the CLI fallback is unavailable")
+    except Exception as e:
+        _MARKER_AVAILABLE = False
+        logger.warning(f"⚠️ Marker OCR not available: {e}")
+        logger.warning("Please run: pip install marker-pdf[full]")
+    return _MARKER_AVAILABLE
+
+
+# Cheap import-time check that only locates the package; importing Marker
+# waits for the first MarkerOCR (see _check_marker_once)
+MARKER_AVAILABLE = importlib.util.find_spec("marker") is not None
+if not MARKER_AVAILABLE:
+    _MARKER_AVAILABLE = False
+    logger.warning("⚠️ Marker OCR not available: the marker package is not installed")
     logger.warning("Please run: pip install marker-pdf[full]")
 
+# Marker's CLIs resolved once, so each run skips the PATH search (and isn't
+# affected by later PATH changes); the bare names remain if not installed
+_MARKER_BIN = shutil.which('marker_single') or 'marker_single'
+_MARKER_BATCH_BIN = shutil.which('marker') or 'marker'
+
+
+@functools.lru_cache(maxsize=4)
+def _probe_marker_cli_at(path: str, mtime: float) -> bool:
+    """Run `marker_single --help` once per binary path and modification time."""
+    result = subprocess.run([path, '--help'], capture_output=True, text=True, timeout=10)
+    return result.returncode == 0
+
+
+def _probe_marker_cli() -> bool:
+    """
+    Check that the marker_single CLI responds, sharing one probe per process.
+    
+    The binary is only re-run if it moved or was reinstalled; MARKER_SKIP_PROBE=1
+    trusts the installation and skips the probe entirely.
+    """
+    if os.environ.get("MARKER_SKIP_PROBE") == "1":
+        return True
+    path = shutil.which(_MARKER_BIN)
+    if path is None:
+        return False
+    return _probe_marker_cli_at(path, os.stat(path).st_mtime)
+
+
+# File extensions Marker can convert
+SUPPORTED_EXTENSIONS = frozenset({
+    # PDF
+    '.pdf',
+    # Images
+    '.jpg', '.jpeg', '.png', '.webp', '.tiff', '.tif', '.bmp',
+    # Microsoft Office
+    '.docx', '.pptx', '.xlsx',
+    # E-books
+    '.epub', '.mobi',
+    # Web
+    '.html', '.htm'
+})
+_SUPPORTED_FORMATS_HINT = (
+    "Supported formats: PDF, images (JPG/PNG/WebP/TIFF/BMP), Office (DOCX/PPTX/XLSX), "
+    "E-books (EPUB/MOBI), HTML"
+)
+
+# Load CUDA kernels on first use rather than all at context creation
+os.environ.setdefault('CUDA_MODULE_LOADING', 'LAZY')
+
+# GPU environment setup runs once per process and requested mode; maps
+# use_gpu to whether GPU acceleration ended up enabled
+_GPU_ENV_CONFIGURED: Dict[bool, bool] = {}
+
+# MARKER_HALF_PRECISION=0 keeps inference in float32; MARKER_AUTO_BATCH_SIZES=0
+# leaves Marker's batch sizes alone instead of scaling them to free VRAM
+HALF_PRECISION = os.environ.get("MARKER_HALF_PRECISION", "1") != "0"
+AUTO_BATCH_SIZES = os.environ.get("MARKER_AUTO_BATCH_SIZES", "1") != "0"
+
+# Batch sizes per GPU_TASK_VRAM of free memory, exported for the models and CLI
+GPU_TASK_VRAM = int(3.75 * 1024 ** 3)
+BATCH_SIZES_PER_TASK = {
+    "DETECTOR_BATCH_SIZE": 6,
+    "RECOGNITION_BATCH_SIZE": 32,
+    "TEXIFY_BATCH_SIZE": 6,
+}
+
+# Processes holding their own copy of the models on the GPU; each one sizes
+# its batches for an equal share of free VRAM. Code that starts model-holding
+# processes sets this for them
+GPU_PROCESSES_ENV = "MARKER_GPU_PROCESSES"
+
+# Names of the settings below that were derived here rather than set by the
+# user; inherited by child processes, which derive their own values instead
+_DERIVED_SETTINGS_ENV = "MARKER_DERIVED_SETTINGS"
+
+
+@functools.lru_cache(maxsize=None)
+def _export_gpu_settings():
+    """
+    Export Marker's device, dtype and batch-size settings for this GPU.
+    
+    Called once, by the process that is about to load models, since the VRAM
+    probe creates a CUDA context. They are environment variables so Marker and
+    any marker_single children pick them up; values set by the user are left
+    as they are.
+    """
+    import torch
+    derived = set(filter(None, os.environ.get(_DERIVED_SETTINGS_ENV, "").split(",")))
+    
+    def export(name: str, value: str):
+        if name in derived or name not in os.environ:
+            os.environ[name] = value
+            derived.add(name)
+    
+    export('TORCH_DEVICE', 'cuda')
+    if HALF_PRECISION:
+        export('TORCH_DTYPE', 'bfloat16' if torch.cuda.is_bf16_supported() else 'float16')
+    if AUTO_BATCH_SIZES:
+        free, _ = torch.cuda.mem_get_info()
+        processes = max(1, int(os.environ.get(GPU_PROCESSES_ENV, "1")))
+        tasks = max(1, free // GPU_TASK_VRAM // processes)
+        for name, per_task in BATCH_SIZES_PER_TASK.items():
+            export(name, str(per_task * tasks))
+        logger.info(
+            f"Batch sizes scaled for {free / 1024 ** 3:.1f} GB free VRAM "
+            f"shared by {processes} process(es) on {torch.cuda.get_device_name(0)}"
+        )
+    os.environ[_DERIVED_SETTINGS_ENV] = ",".join(sorted(derived))
+
+
+def _setup_gpu_environment_once(use_gpu: bool) -> bool:
+    """
+    Configure the GPU environment the first time a mode is requested.
+    
+    Args:
+        use_gpu: Whether GPU acceleration was requested
+        
+    Returns:
+        Whether GPU acceleration is enabled
+    """
+    if use_gpu in _GPU_ENV_CONFIGURED:
+        return _GPU_ENV_CONFIGURED[use_gpu]
+    
+    enabled = False
+    if use_gpu:
+        try:
+            import torch
+            if torch.cuda.is_available():
+                # Set optimal CUDA settings
+                os.environ['CUDA_LAUNCH_BLOCKING'] = '0'
+                os.environ['TORCH_USE_CUDA_DSA'] = '1'
+                
+                # Enable optimized attention if available
+                if hasattr(torch.backends.cuda, 'enable_flash_sdp'):
+                    torch.backends.cuda.enable_flash_sdp(True)
+                
+                # Let cuDNN autotune kernels and use TF32 for float32 matmuls/convolutions
+                torch.backends.cudnn.benchmark = True
+                torch.backends.cuda.matmul.allow_tf32 = True
+                torch.backends.cudnn.allow_tf32 = True
+                
+                # Device settings and batch sizes are exported by _load_models, in
+                # the process that loads models; probing the device here would
+                # create a CUDA context in processes that never use it
+                logger.info("✓ GPU acceleration enabled")
+                enabled = True
+            # Otherwise don't log anything - this is normal for Docker/WSL
+        except ImportError:
+            logger.warning("⚠️ PyTorch not available, falling back to CPU")
+    else:
+        # Force CPU mode
+        os.environ['CUDA_VISIBLE_DEVICES'] = ''
+        logger.info("ℹ️ Using CPU mode")
+    
+    _GPU_ENV_CONFIGURED[use_gpu] = enabled
+    return enabled
+
+
+# Converters built for distinct option sets are kept per MarkerOCR instance
+MAX_CACHED_CONVERTERS = 8
+
+# Loaded Marker models are shared by every MarkerOCR instance in the process,
+# keyed by (device, dtype); the least recently used sets are unloaded past the cap
+MAX_CACHED_MODELS = int(os.environ.get("MARKER_MAX_CACHED_MODELS", "2"))
+_MODEL_CACHE: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+_MODEL_CACHE_LOCK = threading.Lock()
+
+# Marker isn't thread-safe around inference: a PdfConverter sets per-call state
+# such as page_count, and its processors share the predictors and their
+# buffers. Each model set therefore runs one conversion at a time; threads
+# still overlap everything else, and torch already spreads CPU inference
+# over all cores
+_INFERENCE_LOCKS: Dict[tuple, threading.Lock] = {}
+
+
+def _inference_lock(device: Optional[str] = None, dtype=None) -> threading.Lock:
+    """Lock serializing conversions on the model set for a device and dtype."""
+    with _MODEL_CACHE_LOCK:
+        return _INFERENCE_LOCKS.setdefault((device, str(dtype)), threading.Lock())
+
+
+def _get_or_load_models(device: Optional[str] = None, dtype=None) -> Dict[str, Any]:
+    """
+    Return Marker's models for a device and dtype, loading them on first use.
+    
+    Args:
+        device: Torch device, or None to let Marker pick one
+        dtype: Torch dtype, or None for Marker's default
+        
+    Returns:
+        Marker artifact dictionary shared with other instances
+    """
+    key = (device, str(dtype))
+    with _MODEL_CACHE_LOCK:
+        models = _MODEL_CACHE.get(key)
+        if models is not None:
+            _MODEL_CACHE.move_to_end(key)
+            return models
+        
+        from marker.models import create_model_dict
+        models = create_model_dict(device=device, dtype=dtype)
+        _MODEL_CACHE[key] = models
+        
+        while len(_MODEL_CACHE) > MAX_CACHED_MODELS:
+            evicted_key, evicted = _MODEL_CACHE.popitem(last=False)
+            _unload_models(evicted)
+            logger.info(f"Unloaded Marker models for {evicted_key}")
+        return models
+
+
+def _unload_models(models: Dict[str, Any]):
+    """Move evicted models off the GPU and release cached CUDA memory."""
+    for predictor in models.values():
+        module = getattr(predictor, "model", predictor)
+        if hasattr(module, "to"):
+            try:
+                module.to("cpu")
+            except Exception as e:
+                logger.warning(f"Could not move model to CPU: {e}")
+    try:
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    except ImportError:
+        pass
+
+
+# Optional PDF-generation dependencies, probed once at import without importing them
+_HAS_WEASYPRINT = importlib.util.find_spec("weasyprint") is not None
+_HAS_MARKDOWN = importlib.util.find_spec("markdown") is not None
+if not _HAS_WEASYPRINT:
+    logger.warning("⚠️ weasyprint not available - PDF output is disabled")
+
+
+@functools.lru_cache(maxsize=None)
+def _weasyprint():
+    """Import weasyprint on first use; None if it is missing or its native libraries fail to load."""
+    if not _HAS_WEASYPRINT:
+        return None
+    try:
+        import weasyprint
+        return weasyprint
+    except (ImportError, OSError) as e:
+        logger.warning(f"⚠️ weasyprint not available - cannot generate PDF: {e}")
+        return None
+
+
+# Stylesheet applied when rendering HTML to PDF; parsed by weasyprint once
+_PDF_CSS_TEXT = '''
+    @page {
+        margin: 1in;
+        size: letter;
+    }
+    body {
+        font-family: "Times New Roman", serif;
+        font-size: 12pt;
+        line-height: 1.5;
+        color: #000;
+    }
+    h1, h2, h3, h4, h5, h6 {
+        color: #333;
+        margin-top: 1em;
+        margin-bottom: 0.5em;
+    }
+    table {
+        border-collapse: collapse;
+        width: 100%;
+        margin: 1em 0;
+    }
+    th, td {
+        border: 1px solid #ddd;
+        padding: 8px;
+        text-align: left;
+    }
+    th {
+        background-color: #f5f5f5;
+    }
+    img {
+        max-width: 100%;
+        height: auto;
+    }
+    code {
+        background-color: #f5f5f5;
+        padding: 2px 4px;
+        border-radius: 3px;
+        font-family: monospace;
+    }
+    pre {
+        background-color: #f5f5f5;
+        padding: 1em;
+        border-radius: 5px;
+        overflow-x: auto;
+    }
+'''
+
+
+@functools.lru_cache(maxsize=1)
+def _get_pdf_css():
+    """Return the parsed weasyprint stylesheet for generated PDFs, building it on first use."""
+    return _weasyprint().CSS(string=_PDF_CSS_TEXT)
+
+
+# Worker processes rendering PDFs, so weasyprint's CPU-bound layout runs off
+# the caller's thread and GIL; 0 renders in the calling thread instead
+PDF_WORKERS = int(os.environ.get("MARKER_PDF_WORKERS", str(max(2, (os.cpu_count() or 2) // 2))))
+PDF_RENDER_TIMEOUT = 120
+_PDF_POOL: Optional[ProcessPoolExecutor] = None
+_PDF_POOL_LOCK = threading.Lock()
+
+
+def _preload_weasyprint():
+    """PDF pool initializer: import weasyprint and parse the stylesheet once per worker."""
+    _get_pdf_css()
+
+
+def _render_pdf(source: Dict[str, str], pdf_path: str):
+    """Render HTML to a PDF with the shared stylesheet; source holds weasyprint.HTML's arguments."""
+    _weasyprint().HTML(**source).write_pdf(pdf_path, stylesheets=[_get_pdf_css()])
+
+
+def _render_pdf_pooled(source: Dict[str, str], pdf_path: str):
+    """
+    Render a PDF in the PDF worker pool, starting it on first use.
+    
+    Raises:
+        concurrent.futures.TimeoutError: If rendering takes over PDF_RENDER_TIMEOUT seconds
+    """
+    global _PDF_POOL
+    if PDF_WORKERS <= 0:
+        _render_pdf(source, pdf_path)
+        return
+    
+    with _PDF_POOL_LOCK:
+        if _PDF_POOL is None:
+            # spawn: the workers need nothing from this process, least of all its CUDA state
+            _PDF_POOL = ProcessPoolExecutor(
+                max_workers=PDF_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_preload_weasyprint
+            )
+        pool = _PDF_POOL
+    
+    try:
+        pool.submit(_render_pdf, source, pdf_path).result(timeout=PDF_RENDER_TIMEOUT)
+    except BrokenProcessPool:
+        # A worker died (e.g. in a native library); start a fresh pool next time
+        with _PDF_POOL_LOCK:
+            if _PDF_POOL is pool:
+                _PDF_POOL = None
+        pool.shutdown(wait=False)
+        raise
+
+
+# Standalone HTML document wrapped around markdown rendered for PDF generation
+_HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>$base_name</title>
+    <style>
+        body {
+            font-family: "Times New Roman", serif;
+            font-size: 12pt;
+            line-height: 1.6;
+            max-width: 800px;
+            margin: 0 auto;
+            padding: 1em;
+            color: #333;
+        }
+        h1, h2, h3, h4, h5, h6 {
+            color: #222;
+            margin-top: 1.5em;
+            margin-bottom: 0.5em;
+        }
+        table {
+            border-collapse: collapse;
+            width: 100%;
+            margin: 1em 0;
+        }
+        th, td {
+            border: 1px solid #ddd;
+            padding: 8px;
+            text-align: left;
+        }
+        th {
+            background-color: #f5f5f5;
+            font-weight: bold;
+        }
+        code {
+            background-color: #f5f5f5;
+            padding: 2px 4px;
+            border-radius: 3px;
+            font-family: 'Courier New', monospace;
+            font-size: 0.9em;
+        }
+        pre {
+            background-color: #f5f5f5;
+            padding: 1em;
+            border-radius: 5px;
+            overflow-x: auto;
+        }
+        pre code {
+            background: none;
+            padding: 0;
+        }
+        blockquote {
+            border-left: 4px solid #ddd;
+            margin: 1em 0;
+            padding-left: 1em;
+            color: #666;
+        }
+        img {
+            max-width: 100%;
+            height: auto;
+            margin: 1em 0;
+        }
+    </style>
+</head>
+<body>
+$html_content
+</body>
+</html>"""
+
+# The template cut around its two fields once, so filling it in is a join
+_HTML_HEAD, _HTML_STYLE, _HTML_TAIL = (
+    _HTML_TEMPLATE.replace("$html_content", "$base_name").split("$base_name")
+)
+
+
+def _render_html_document(base_name: str, html_content: str) -> str:
+    """Wrap rendered markdown in the standalone HTML template."""
+    return "".join((_HTML_HEAD, base_name, _HTML_STYLE, html_content, _HTML_TAIL))
+
+
+# Trailing marker_single stderr lines kept for error reports
+CLI_STDERR_TAIL_LINES = 500
+
+# A marker_single run that prints nothing (Marker reports progress on stderr)
+# for this many seconds is treated as hung; 0 disables the check
+CLI_IDLE_TIMEOUT = float(os.environ.get("MARKER_IDLE_TIMEOUT", "120"))
+CLI_POLL_INTERVAL = 1.0
+
+
+class _CLIStalled(subprocess.TimeoutExpired):
+    """A marker_single run went CLI_IDLE_TIMEOUT seconds without output and was killed."""
+
+
+def _run_marker_cli(cmd: List[str], timeout: float,
+                    idle_timeout: float = CLI_IDLE_TIMEOUT) -> Tuple[int, str]:
+    """
+    Run marker_single, draining its stderr line by line.
+    
+    Lines (including each progress bar update) go to the debug log and only
+    the last CLI_STDERR_TAIL_LINES are kept, so chatty runs neither pile up
+    in memory nor stall on a full pipe. Each line also counts as progress;
+    a run that goes quiet for idle_timeout seconds is killed early instead
+    of holding its slot until the overall timeout.
+    
+    Returns:
+        Tuple of (return code, stderr tail)
+        
+    Raises:
+        _CLIStalled: If the run shows no progress for idle_timeout (it is killed)
+        subprocess.TimeoutExpired: If the run exceeds the timeout (it is killed)
+    """
+    tail: "deque[str]" = deque(maxlen=CLI_STDERR_TAIL_LINES)
+    # close_fds=False lets Popen use posix_spawn; Python's own descriptors are
+    # non-inheritable anyway
+    process = subprocess.Popen(
+        cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        text=True, errors="replace", bufsize=1, close_fds=False
+    )
+    last_output = time.monotonic()
+    
+    def drain():
+        nonlocal last_output
+        for line in process.stderr:
+            last_output = time.monotonic()
+            tail.append(line)
+            logger.debug(line.rstrip())
+    
+    reader = threading.Thread(target=drain, name="marker-cli-stderr", daemon=True)
+    reader.start()
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                raise subprocess.TimeoutExpired(cmd, timeout)
+            if idle_timeout and now - last_output >= idle_timeout:
+                raise _CLIStalled(cmd, idle_timeout)
+            try:
+                returncode = process.wait(timeout=min(deadline - now, CLI_POLL_INTERVAL))
+                break
+            except subprocess.TimeoutExpired:
+                continue
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+        raise
+    finally:
+        # Marker's own worker processes may briefly hold the pipe open
+        reader.join(timeout=5)
+    process.stderr.close()
+    return returncode, "".join(tail)
+
+
+# Async runs read stderr in raw chunks (tqdm redraws with \r, not newlines)
+# and keep the last CLI_STDERR_TAIL_BYTES or so, decoded only for errors
+CLI_STDERR_CHUNK_SIZE = 4096
+CLI_STDERR_TAIL_BYTES = 64 * 1024
+
+
+async def _drain_marker_cli_async(process: asyncio.subprocess.Process, cmd: List[str],
+                                  idle_timeout: float = CLI_IDLE_TIMEOUT) -> str:
+    """
+    Read an asyncio marker_single process's stderr to EOF and wait for it to exit.
+    
+    Returns:
+        The stderr tail
+        
+    Raises:
+        _CLIStalled: If nothing arrives on stderr for idle_timeout seconds
+    """
+    tail: "deque[bytes]" = deque(maxlen=CLI_STDERR_TAIL_BYTES // CLI_STDERR_CHUNK_SIZE)
+    while True:
+        try:
+            chunk = await asyncio.wait_for(
+                process.stderr.read(CLI_STDERR_CHUNK_SIZE), idle_timeout or None
+            )
+        except asyncio.TimeoutError:
+            raise _CLIStalled(cmd, idle_timeout) from None
+        if not chunk:
+            break
+        tail.append(chunk)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(chunk.decode(errors="replace").rstrip())
+    await process.wait()
+    return b"".join(tail).decode(errors="replace")
+
+
+# Conversion timeout: TIMEOUT_BASE seconds plus a per-page budget for the
+# estimated page count, never below TIMEOUT_FLOOR. Fresh marker/marker_single
+# processes also get CLI_COLD_START for importing torch and loading every model
+# before the first page; persistent workers have theirs loaded already
+TIMEOUT_BASE = float(os.environ.get("MARKER_TIMEOUT_BASE", "60"))
+CLI_COLD_START = float(os.environ.get("MARKER_CLI_COLD_START", "120"))
+TIMEOUT_PER_PAGE_GPU = 3.0
+TIMEOUT_PER_PAGE_CPU = 10.0
+TIMEOUT_FLOOR = 30.0
+# Rough bytes per page for documents whose pages can't be counted cheaply
+BYTES_PER_PAGE_ESTIMATE = 100 * 1024
+IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.webp', '.tiff', '.tif', '.bmp'})
+
+# Approximate VRAM taken by one worker of the `marker` batch CLI
+BATCH_WORKER_VRAM = int(3.5 * 1024 ** 3)
+
+
+def _free_vram() -> int:
+    """
+    Free memory on the first visible GPU, in bytes.
+    
+    Asks nvidia-smi unless this process already has a CUDA context, so that
+    sizing worker pools doesn't create one in a process that holds no models.
+    """
+    import torch
+    if torch.cuda.is_initialized():
+        free, _ = torch.cuda.mem_get_info()
+        return free
+    device = os.environ.get("CUDA_VISIBLE_DEVICES", "").split(",")[0].strip() or "0"
+    output = subprocess.run(
+        ["nvidia-smi", f"--id={device}", "--query-gpu=memory.free", "--format=csv,noheader,nounits"],
+        capture_output=True, text=True, timeout=10, check=True
+    ).stdout
+    return int(output.split()[0]) * 1024 ** 2
+
+
+_HAS_PYPDF = importlib.util.find_spec("pypdf") is not None
+
+
+def _estimate_pages(input_path: str) -> int:
+    """Cheap page-count estimate: the PDF page tree if pypdf is installed, else file size."""
+    suffix = os.path.splitext(input_path)[1].lower()
+    if suffix in IMAGE_EXTENSIONS:
+        return 1
+    if suffix == '.pdf' and _HAS_PYPDF:
+        try:
+            from pypdf import PdfReader
+            return len(PdfReader(input_path).pages)
+        except Exception as e:
+            logger.debug(f"Page count probe failed for {input_path}: {e}")
+    return max(1, os.path.getsize(input_path) // BYTES_PER_PAGE_ESTIMATE)
+
+
+def _estimate_timeout(input_path: str, max_pages: Optional[int], per_page: float,
+                      base: float = TIMEOUT_BASE) -> float:
+    """Seconds to allow a conversion of input_path, capped to max_pages pages."""
+    pages = _estimate_pages(input_path)
+    if max_pages:
+        pages = min(pages, max_pages)
+    return max(TIMEOUT_FLOOR, base + per_page * pages)
+
+
+# Extracted image files returned by a conversion
+IMAGE_SUFFIXES = (".png", ".jpg")
+
+
+def _prefetch_files(paths: List[Optional[str]]):
+    """
+    Ask the kernel to start reading files into the page cache.
+    
+    posix_fadvise(WILLNEED) queues readahead for every file without waiting,
+    so the reads that follow are overlapped instead of one blocking read after
+    another. A no-op where posix_fadvise doesn't exist.
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    for path in paths:
+        if not path:
+            continue
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+
+def _remove_unrequested(paths: List[str]):
+    """Delete output files nobody asked for, logging rather than raising on failure."""
+    for path in paths:
+        try:
+            os.unlink(path)
+            logger.info(f"Removed unrequested file: {path}")
+        except OSError as e:
+            logger.warning(f"Error removing {path}: {e}")
+
+
+def _map_images(paths: List[str]) -> List[Union[mmap.mmap, bytes]]:
+    """Memory-map image files read-only (empty files become b"")."""
+    _prefetch_files(paths)
+    maps: List[Union[mmap.mmap, bytes]] = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size:
+                maps.append(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            else:
+                maps.append(b"")
+    return maps
+
+
+def _json_loads(data: Union[str, bytes]) -> Any:
+    """Parse JSON with orjson when installed."""
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
+def _json_dumps(obj: Any, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON with orjson when installed; unknown types are stringified."""
+    if orjson:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, default=str, indent=2 if indent else None, ensure_ascii=False).encode('utf-8')
+
+
+# Markdown converter reused for every file; built on first use. A Markdown
+# instance keeps per-document state, so conversions hold the lock
+_MD_CONVERTER = None
+_MD_LOCK = threading.Lock()
+
+
+def _convert_markdown(text: str) -> str:
+    """
+    Render markdown to HTML with the shared converter, building it on first use.
+    
+    Raises:
+        ImportError: If the markdown package is not installed
+    """
+    global _MD_CONVERTER
+    with _MD_LOCK:
+        if _MD_CONVERTER is None:
+            import markdown
+            _MD_CONVERTER = markdown.Markdown(extensions=['tables', 'codehilite', 'toc'])
+        return _MD_CONVERTER.reset().convert(text)
+
+
+# Output files larger than this are decoded straight from a memory map
+MMAP_READ_THRESHOLD = 1 << 20
+
+
+def _read_text(path: str) -> str:
+    """
+    Read a UTF-8 output file in one go, announcing the sequential access to the kernel.
+    
+    Large files are decoded from a memory map without a read copy; the rest
+    are read with os.read on the raw descriptor, bypassing the buffered and
+    text I/O layers.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        if size > MMAP_READ_THRESHOLD:
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mapped:
+                if hasattr(mapped, 'madvise'):
+                    mapped.madvise(mmap.MADV_SEQUENTIAL)
+                return str(mapped, 'utf-8')
+        
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(fd, 0, size, os.POSIX_FADV_SEQUENTIAL)
+        chunks = []
+        while size > 0:
+            chunk = os.read(fd, size)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b"".join(chunks).decode('utf-8')
+    finally:
+        os.close(fd)
+
+
+def _list_dir(path: str) -> Tuple[Dict[str, str], Set[str]]:
+    """
+    List a directory in one scandir pass.
+    
+    Returns:
+        Regular files as {name: path} and the names of subdirectories;
+        both empty if the directory doesn't exist
+    """
+    files: Dict[str, str] = {}
+    dirs: Set[str] = set()
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    files[entry.name] = entry.path
+                elif entry.is_dir():
+                    dirs.add(entry.name)
+    except (FileNotFoundError, NotADirectoryError):
+        pass
+    return files, dirs
+
+
+def _find_listed(listings: Dict[str, Tuple[Dict[str, str], Set[str]]],
+                 candidates: List[Tuple[str, str]]) -> Optional[str]:
+    """Return the first (subdirectory, file name) candidate present in the listings."""
+    for subdir, name in candidates:
+        if subdir in listings and name in listings[subdir][0]:
+            return listings[subdir][0][name]
+    return None
+
+
+# Seconds a persistent worker may take to start and load its models, on top of
+# (not counted against) the timeout of the job it was started for
+WORKER_START_TIMEOUT = float(os.environ.get("MARKER_WORKER_START_TIMEOUT", "600"))
+
+
+class _MarkerWorker:
+    """
+    A long-lived `marker_wrapper.py --worker` process that keeps Marker's models loaded.
+    
+    Once its models are loaded the process writes one ready line on its stdout.
+    Jobs are _convert_with_cli keyword arguments sent as one JSON line on its
+    stdin; the result comes back as one JSON line on its stdout. The process
+    is (re)started on demand and handles one job at a time.
+    """
+    
+    def __init__(self, use_gpu: bool, gpu_processes: int = 1):
+        self.use_gpu = use_gpu
+        # Workers sharing the GPU, each sizing its batches for its share
+        self.gpu_processes = gpu_processes
+        self.process: Optional[subprocess.Popen] = None
+        self.ready = False
+        self.lock = threading.Lock()
+    
+    def start(self):
+        """Start the worker process unless it is already running; it loads models right away."""
+        if self.process is not None and self.process.poll() is None:
+            return
+        self.ready = False
+        cmd = [sys.executable, os.path.abspath(__file__), "--worker"]
+        if not self.use_gpu:
+            cmd.append("--cpu")
+        self.process = subprocess.Popen(
+            cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1,
+            env={**os.environ, GPU_PROCESSES_ENV: str(self.gpu_processes)}
+        )
+        logger.info(f"Started persistent Marker worker (pid {self.process.pid})")
+    
+    def wait_ready(self):
+        """
+        Start the worker if needed and wait for its ready line.
+        
+        Raises:
+            RuntimeError: If the worker exits or takes over WORKER_START_TIMEOUT
+                to load its models (it is killed)
+        """
+        self.start()
+        if self.ready:
+            return
+        process = self.process
+        ready, _, _ = select.select([process.stdout], [], [], WORKER_START_TIMEOUT)
+        if not ready:
+            self.stop()
+            raise RuntimeError(f"Marker worker did not start within {WORKER_START_TIMEOUT:.0f} seconds")
+        if not process.stdout.readline():
+            self.stop()
+            raise RuntimeError("Marker worker exited while starting")
+        self.ready = True
+        logger.info(f"Persistent Marker worker ready (pid {process.pid})")
+    
+    def submit(self, job: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """
+        Run one job and return its result.
+        
+        The job's timeout starts once the worker is ready, so a restart's
+        interpreter and model startup is not counted against it.
+        
+        Raises:
+            subprocess.TimeoutExpired: If the job exceeds the timeout (the worker is killed)
+            RuntimeError: If the worker fails to start or exits without replying
+        """
+        with self.lock:
+            self.wait_ready()
+            process = self.process
+            process.stdin.write(json.dumps(job) + "\n")
+            process.stdin.flush()
+            
+            ready, _, _ = select.select([process.stdout], [], [], timeout)
+            if not ready:
+                self.stop()
+                raise subprocess.TimeoutExpired(process.args, timeout)
+            
+            line = process.stdout.readline()
+            if not line:
+                self.stop()
+                raise RuntimeError("Marker worker exited unexpectedly")
+            return _json_loads(line)
+    
+    def stop(self):
+        """Kill the worker process, if running."""
+        if self.process is not None:
+            self.process.kill()
+            self.process.wait()
+            self.process = None
+            self.ready = False
+
 
 class MarkerOCR:
     """
     Enhanced Marker OCR wrapper with lazy loading and error handling.
     """
     
-    def __init__(self, lazy_load: bool = True, use_gpu: bool = True):
+    def __init__(self, lazy_load: bool = True, use_gpu: bool = True, warmup: bool = False,
+                 persistent_workers: Optional[int] = None):
         """
         Initialize MarkerOCR wrapper.
         
         Args:
             lazy_load: If True, models are loaded only when first needed
             use_gpu: Whether to use GPU acceleration if available
+            warmup: With lazy_load, start loading models in a background thread
+                right away; the first conversion waits for it to finish
+            persistent_workers: Convert in this many long-lived worker processes,
+                each with its own copy of the models (about 1 GB of VRAM each),
+                used round-robin; 0 converts in this process. Defaults to the
+                MARKER_PERSISTENT_WORKERS environment variable, or 0
         """
         self.models = None
         self.models_loaded = False
+        self.dtype = None
+        self._inference_lock: Optional[threading.Lock] = None
+        self._warmup_thread: Optional[threading.Thread] = None
+        self._converters: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._converters_lock = threading.Lock()
         self.use_gpu = use_gpu
         self.logger = logging.getLogger("marker_ocr")
         
-        # Check availability on each instance creation to be safe
-        self.available = self._check_marker_availability()
+        # Availability is checked once per process and shared by all instances
+        self.available = _check_marker_once()
+        self._info: Dict[str, Any] = {"marker_available": self.available}
+        if self.available:
+            marker = sys.modules["marker"]
+            self._info["marker_version"] = getattr(marker, "__version__", "unknown")
+            self._info["marker_location"] = marker.__file__
         
         # Configure GPU settings
         self._setup_gpu_environment()
         
+        if persistent_workers is None:
+            persistent_workers = int(os.environ.get("MARKER_PERSISTENT_WORKERS", "0"))
+        self._workers = [
+            _MarkerWorker(self.use_gpu, persistent_workers) for _ in range(persistent_workers)
+        ]
+        self._next_worker = itertools.count()
+        
         if not lazy_load and self.available:
             self._load_models()
-    
-    def _check_marker_availability(self) -> bool:
-        """Check if Marker is available for this instance."""
-        try:
-            import marker
-            import subprocess
-            # Test CLI availability
-            result = subprocess.run(['marker_single', '--help'], 
-                                  capture_output=True, text=True, timeout=5)
-            if result.returncode == 0:
-                self.logger.info("✓ Marker OCR is available (CLI)")
-                return True
-            else:
-                self.logger.warning("⚠️ Marker CLI not responding")
-                return False
-        except Exception as e:
-            self.logger.warning(f"⚠️ Marker OCR not available: {e}")
-            self.logger.warning("Please run: pip install marker-pdf[full]")
-            return False
+        elif warmup and self.available:
+            self._warmup_thread = threading.Thread(
+                target=self._load_models, name="marker-warmup", daemon=True
+            )
+            self._warmup_thread.start()
     
     def _setup_gpu_environment(self):
         """Configure GPU environment for optimal performance."""
-        if self.use_gpu:
-            try:
-                import torch
-                if torch.cuda.is_available():
-                    # Set optimal CUDA settings
-                    os.environ['CUDA_LAUNCH_BLOCKING'] = '0'
-                    os.environ['TORCH_USE_CUDA_DSA'] = '1'
-                    
-                    # Enable optimized attention if available
-                    if hasattr(torch.backends.cuda, 'enable_flash_sdp'):
-                        torch.backends.cuda.enable_flash_sdp(True)
-                    
-                    self.logger.info(f"✓ GPU acceleration enabled - {torch.cuda.get_device_name(0)}")
-                else:
-                    # Don't log anything - this is normal for Docker/WSL
-                    self.use_gpu = False
-            except ImportError:
-                self.logger.warning("⚠️ PyTorch not available, falling back to CPU")
-                self.use_gpu = False
-        else:
-            # Force CPU mode
-            os.environ['CUDA_VISIBLE_DEVICES'] = ''
-            self.logger.info("ℹ️ Using CPU mode")
+        self.use_gpu = _setup_gpu_environment_once(self.use_gpu)
     
     def _convert_with_cli(self, input_path: str, output_dir: str, 
                          output_format: str = "markdown", 
@@ -129,299 +1002,382 @@ class MarkerOCR:
                          gemini_api_key: str = None,
                          gemini_model: str = None,
                          images_dir: str = None,
-                         organized_output: bool = False) -> Dict[str, Any]:
-        """Convert file using Marker CLI."""
-        import subprocess
-        import json
-        from pathlib import Path
-        
+                         organized_output: bool = False,
+                         return_text: bool = True,
+                         generate_pdf: bool = False,
+                         timeout_base: Optional[float] = None,
+                         timeout_per_page: Optional[float] = None) -> Dict[str, Any]:
+        """Convert file using the in-process Marker API, or the Marker CLI as a fallback."""
+        timeout = None
         try:
-            # Build CLI command
-            cmd = ['marker_single', input_path, '--output_dir', output_dir]
-            
-            # Add output format - ONLY generate the requested format
-            if output_format == "json":
-                cmd.extend(['--output_format', 'json'])
-            elif output_format == "html":
-                cmd.extend(['--output_format', 'html'])
-            elif output_format == "pdf":
-                # For PDF, we need markdown first, then convert to PDF
-                cmd.extend(['--output_format', 'markdown'])
-            else:  # default to markdown
-                cmd.extend(['--output_format', 'markdown'])
-                
+            if self._workers:
+                timeout = self._cli_timeout(
+                    input_path, max_pages, timeout_base, timeout_per_page, cold_start=False
+                )
+                worker = self._workers[next(self._next_worker) % len(self._workers)]
+                return worker.submit({
+                    "input_path": input_path, "output_dir": output_dir,
+                    "output_format": output_format, "extract_images": extract_images,
+                    "max_pages": max_pages, "use_llm": use_llm, "llm_service": llm_service,
+                    "ollama_base_url": ollama_base_url, "ollama_model": ollama_model,
+                    "gemini_api_key": gemini_api_key, "gemini_model": gemini_model,
+                    "images_dir": images_dir, "organized_output": organized_output,
+                    "return_text": return_text, "generate_pdf": generate_pdf,
+                    "timeout_base": timeout_base, "timeout_per_page": timeout_per_page
+                }, timeout)
+            
+            # Options use the CLI's flag names; the API's ConfigParser accepts the same keys
+            options = self._marker_options(
+                output_dir, output_format, extract_images, max_pages,
+                use_llm, llm_service, ollama_base_url, ollama_model,
+                gemini_api_key, gemini_model
+            )
+            
             # Note: We can't disable other outputs with CLI flags directly
             # We'll have to handle this by cleaning up unwanted files after processing
             
-            # Add image extraction setting
-            if not extract_images:
-                cmd.append('--disable_image_extraction')
-            
-            # Add page range if specified
-            if max_pages:
-                cmd.extend(['--page_range', f'0-{max_pages-1}'])
-            
-            # Add LLM support if enabled
-            if use_llm:
-                cmd.append('--use_llm')
-                if llm_service:
-                    cmd.extend(['--llm_service', llm_service])
-                if ollama_base_url:
-                    cmd.extend(['--OllamaService_ollama_base_url', ollama_base_url])
-                if ollama_model:
-                    cmd.extend(['--OllamaService_ollama_model', ollama_model])
-                # Add Gemini support
-                if gemini_api_key:
-                    cmd.extend(['--GoogleGeminiService_gemini_api_key', gemini_api_key])
-                if gemini_model:
-                    cmd.extend(['--GoogleGeminiService_gemini_model_name', gemini_model])
-            
-            logger.info(f"Running: {' '.join(cmd)}")
-            
-            # Run the command
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-            
-            if result.returncode != 0:
-                error_msg = result.stderr or "Unknown CLI error"
-                logger.error(f"CLI failed: {error_msg}")
+            pages_processed = "CLI"
+            rendered_output = None
+            if self.models is not None:
+                # Models are resident; convert without starting a new interpreter
+                logger.info(f"Converting in-process: {input_path}")
+                pages_processed, rendered_output = self._convert_native(input_path, options)
+            else:
+                cmd = self._build_cli_command(input_path, options)
+                timeout = self._cli_timeout(input_path, max_pages, timeout_base, timeout_per_page)
+                logger.info(f"Running (timeout {timeout:.0f}s): {' '.join(cmd)}")
+                
+                # Run the command
+                returncode, stderr = _run_marker_cli(cmd, timeout=timeout)
+                
+                if returncode != 0:
+                    return self._cli_error(stderr)
+            
+            return self._collect_outputs(
+                input_path, output_dir, output_format, extract_images,
+                organized_output, pages_processed, return_text, generate_pdf,
+                rendered_output
+            )
+            
+        except _CLIStalled as e:
+            return {
+                "success": False,
+                "error": f"Conversion stalled (no progress for {e.timeout:.0f} seconds)"
+            }
+        except subprocess.TimeoutExpired:
+            return {
+                "success": False,
+                "error": f"Conversion timed out ({timeout:.0f} seconds)"
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Marker conversion failed: {str(e)}"
+            }
+
+    async def _convert_with_cli_async(self, input_path: str, output_dir: str, 
+                         output_format: str = "markdown", 
+                         extract_images: bool = True,
+                         max_pages: Optional[int] = None,
+                         use_llm: bool = False,
+                         llm_service: str = None,
+                         ollama_base_url: str = None,
+                         ollama_model: str = None,
+                         gemini_api_key: str = None,
+                         gemini_model: str = None,
+                         images_dir: str = None,
+                         organized_output: bool = False,
+                         return_text: bool = True,
+                         generate_pdf: bool = False,
+                         timeout_base: Optional[float] = None,
+                         timeout_per_page: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Async counterpart of _convert_with_cli.
+        
+        The Marker CLI runs as an asyncio subprocess, so many files can be
+        converted at once without a blocked thread each; in-process
+        conversions and output collection run in a worker thread.
+        """
+        if self.models is not None or self._workers:
+            return await asyncio.to_thread(
+                self._convert_with_cli, input_path, output_dir, output_format,
+                extract_images, max_pages, use_llm, llm_service, ollama_base_url,
+                ollama_model, gemini_api_key, gemini_model, images_dir, organized_output,
+                return_text, generate_pdf, timeout_base, timeout_per_page
+            )
+        
+        try:
+            options = self._marker_options(
+                output_dir, output_format, extract_images, max_pages,
+                use_llm, llm_service, ollama_base_url, ollama_model,
+                gemini_api_key, gemini_model
+            )
+            cmd = self._build_cli_command(input_path, options)
+            timeout = await asyncio.to_thread(
+                self._cli_timeout, input_path, max_pages, timeout_base, timeout_per_page
+            )
+            logger.info(f"Running (timeout {timeout:.0f}s): {' '.join(cmd)}")
+            
+            process = await asyncio.create_subprocess_exec(
+                *cmd, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE,
+                close_fds=False
+            )
+            try:
+                stderr = await asyncio.wait_for(
+                    _drain_marker_cli_async(process, cmd), timeout=timeout
+                )
+            except (_CLIStalled, asyncio.TimeoutError) as e:
+                process.kill()
+                await process.wait()
+                if isinstance(e, _CLIStalled):
+                    error = f"Conversion stalled (no progress for {e.timeout:.0f} seconds)"
+                else:
+                    error = f"Conversion timed out ({timeout:.0f} seconds)"
                 return {
                     "success": False,
-                    "error": f"Marker CLI failed: {error_msg}"
+                    "error": error
                 }
             
+            if process.returncode != 0:
+                return self._cli_error(stderr)
+            
+            return await asyncio.to_thread(
+                self._collect_outputs, input_path, output_dir, output_format,
+                extract_images, organized_output, "CLI", return_text, generate_pdf
+            )
+            
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Marker conversion failed: {str(e)}"
+            }
+
+    def _cli_timeout(self, input_path: str, max_pages: Optional[int],
+                     timeout_base: Optional[float] = None,
+                     timeout_per_page: Optional[float] = None,
+                     cold_start: bool = True) -> float:
+        """
+        Timeout for a marker_single run, scaled to the document's estimated page count.
+        
+        cold_start adds CLI_COLD_START for a process that still has to load
+        its models; pass False for a persistent worker.
+        """
+        if timeout_per_page is None:
+            timeout_per_page = TIMEOUT_PER_PAGE_GPU if self.use_gpu else TIMEOUT_PER_PAGE_CPU
+        if timeout_base is None:
+            timeout_base = TIMEOUT_BASE
+        if cold_start:
+            timeout_base += CLI_COLD_START
+        return _estimate_timeout(input_path, max_pages, timeout_per_page, timeout_base)
+
+    def _build_cli_command(self, input_path: str, options: Dict[str, Any],
+                           binary: str = _MARKER_BIN) -> List[str]:
+        """Build the marker_single (or batch `marker`) command line for a set of Marker options."""
+        cmd = [binary, input_path]
+        for key, value in options.items():
+            cmd.append(f'--{key}')
+            if value is not True:
+                cmd.append(str(value))
+        return cmd
+
+    def _cli_error(self, stderr: str) -> Dict[str, Any]:
+        """Result for a marker_single run that exited with an error."""
+        error_msg = stderr or "Unknown CLI error"
+        logger.error(f"CLI failed: {error_msg}")
+        return {
+            "success": False,
+            "error": f"Marker CLI failed: {error_msg}"
+        }
+
+    def _collect_outputs(self, input_path: str, output_dir: str, output_format: str,
+                         extract_images: bool, organized_output: bool,
+                         pages_processed: Union[int, str],
+                         return_text: bool = True,
+                         generate_pdf: bool = False,
+                         rendered_output: Optional[Tuple[str, str]] = None) -> Dict[str, Any]:
+        """
+        Find Marker's output files, derive requested formats and drop unrequested ones.
+        
+        rendered_output is the (path, text) of an output the native path just
+        wrote; its text is used as is instead of being read back from disk.
+        """
+        def is_rendered(path: str) -> bool:
+            return rendered_output is not None and os.path.normpath(path) == rendered_output[0]
+        
+        def read_output(path: str) -> str:
+            return rendered_output[1] if is_rendered(path) else _read_text(path)
+        
+        try:
             # Find output files
-            output_path = Path(output_dir)
             input_name = Path(input_path).stem
             
-            # Look for generated files
-            markdown_file = None
-            json_file = None
-            html_file = None
             text_content = ""
             
-            # Use a more targeted search approach based on expected file patterns
-            # This is much faster than recursively searching all subdirectories
-            
-            # Define expected file paths based on how Marker generates files
-            expected_paths = {
-                "markdown": [
-                    output_path / f"{input_name}.md",  # Direct in output dir
-                    output_path / input_name / f"{input_name}.md",  # In document-specific subdir
-                    output_path / "markdown" / f"{input_name}.md"  # In format-specific dir
-                ],
-                "json": [
-                    output_path / f"{input_name}.json",
-                    output_path / f"{input_name}_meta.json",
-                    output_path / input_name / f"{input_name}.json",
-                    output_path / input_name / f"{input_name}_meta.json",
-                    output_path / "json" / f"{input_name}.json"
-                ],
-                "html": [
-                    output_path / f"{input_name}.html",
-                    output_path / f"{input_name}_temp.html",
-                    output_path / input_name / f"{input_name}.html",
-                    output_path / "html" / f"{input_name}.html"
-                ]
-            }
+            # List the output directory, and the subdirectories Marker writes
+            # into, once; every lookup below is answered from these listings
+            top_files, top_dirs = _list_dir(output_dir)
+            listings = {"": (top_files, top_dirs)}
+            subdirs = (input_name, "markdown", "json", "html") + (("images",) if extract_images else ())
+            for subdir in subdirs:
+                if subdir in top_dirs:
+                    listings[subdir] = _list_dir(os.path.join(output_dir, subdir))
+            doc_files, doc_dirs = listings.get(input_name, ({}, set()))
+            doc_images = os.path.join(input_name, "images")
+            if extract_images and "images" in doc_dirs:
+                listings[doc_images] = _list_dir(os.path.join(output_dir, doc_images))
             
-            # Check for markdown files in expected locations
-            if not markdown_file:
-                for path in expected_paths["markdown"]:
-                    if path.exists() and path.is_file():
-                        markdown_file = str(path)
-                        with open(path, 'r', encoding='utf-8') as f:
-                            text_content = f.read()
-                        logger.info(f"Found markdown file: {path.name}")
-                        break
+            # Expected file locations based on how Marker generates files:
+            # directly in the output dir, in a document-specific subdir, or in
+            # a format-specific dir
+            markdown_file = _find_listed(listings, [
+                ("", f"{input_name}.md"),
+                (input_name, f"{input_name}.md"),
+                ("markdown", f"{input_name}.md")
+            ])
+            json_file = _find_listed(listings, [
+                ("", f"{input_name}.json"),
+                ("", f"{input_name}_meta.json"),
+                (input_name, f"{input_name}.json"),
+                (input_name, f"{input_name}_meta.json"),
+                ("json", f"{input_name}.json")
+            ])
+            html_file = _find_listed(listings, [
+                ("", f"{input_name}.html"),
+                ("", f"{input_name}_temp.html"),
+                (input_name, f"{input_name}.html"),
+                ("html", f"{input_name}.html")
+            ])
             
-            # Check for JSON files in expected locations
-            if not json_file:
-                for path in expected_paths["json"]:
-                    if path.exists() and path.is_file():
-                        json_file = str(path)
-                        if not text_content:
-                            with open(path, 'r', encoding='utf-8') as f:
-                                try:
-                                    json_data = json.load(f)
-                                    text_content = json_data.get('text', '')
-                                except json.JSONDecodeError:
-                                    # If JSON is invalid, just read as text
-                                    f.seek(0)
-                                    text_content = f.read()
-                        logger.info(f"Found JSON file: {path.name}")
-                        break
+            # If files still not found, take any output in the top level, then
+            # in the document-specific subdirectory
+            for files in (top_files, doc_files):
+                if markdown_file or json_file or html_file:
+                    break
+                for name, file_path in files.items():
+                    suffix = os.path.splitext(name)[1]
+                    if suffix == '.md' and not markdown_file:
+                        markdown_file = file_path
+                    elif suffix == '.json' and not json_file:
+                        json_file = file_path
+                    elif suffix == '.html' and not html_file:
+                        html_file = file_path
             
-            # Check for HTML files in expected locations
-            if not html_file:
-                for path in expected_paths["html"]:
-                    if path.exists() and path.is_file():
-                        html_file = str(path)
-                        logger.info(f"Found HTML file: {path.name}")
-                        break
-                        
-            # If files still not found, check top level files
-            if not (markdown_file or json_file or html_file):
-                # Look only in the direct output directory
-                for file_path in output_path.iterdir():
-                    if file_path.is_file():
-                        if file_path.suffix == '.md' and not markdown_file:
-                            markdown_file = str(file_path)
-                            with open(file_path, 'r', encoding='utf-8') as f:
-                                text_content = f.read()
-                            logger.info(f"Found markdown file: {file_path.name}")
-                        elif file_path.suffix == '.json' and not json_file:
-                            json_file = str(file_path)
-                            if not text_content:
-                                with open(file_path, 'r', encoding='utf-8') as f:
-                                    json_data = json.load(f)
-                                    text_content = json_data.get('text', '')
-                            logger.info(f"Found JSON file: {file_path.name}")
-                        elif file_path.suffix == '.html' and not html_file:
-                            html_file = str(file_path)
-                            logger.info(f"Found HTML file: {file_path.name}")
-            
-            # Only if still not found, search document-specific subdirectories (one level only)
-            if not (markdown_file or json_file or html_file):
-                document_dir = output_path / input_name
-                if document_dir.exists() and document_dir.is_dir():
-                    for file_path in document_dir.iterdir():
-                        if file_path.is_file():
-                            if file_path.suffix == '.md' and not markdown_file:
-                                markdown_file = str(file_path)
-                                with open(file_path, 'r', encoding='utf-8') as f:
-                                    text_content = f.read()
-                                logger.info(f"Found markdown file in document dir: {file_path.name}")
-                            elif file_path.suffix == '.json' and not json_file:
-                                json_file = str(file_path)
-                                if not text_content:
-                                    with open(file_path, 'r', encoding='utf-8') as f:
-                                        json_data = json.load(f)
-                                        text_content = json_data.get('text', '')
-                                logger.info(f"Found JSON file in document dir: {file_path.name}")
-                            elif file_path.suffix == '.html' and not html_file:
-                                html_file = str(file_path)
-                                logger.info(f"Found HTML file in document dir: {file_path.name}")
+            if return_text:
+                _prefetch_files([markdown_file, json_file])
+            
+            # Markdown already read here is handed to HTML/PDF rendering below
+            markdown_text = None
+            if markdown_file:
+                if return_text or is_rendered(markdown_file):
+                    markdown_text = read_output(markdown_file)
+                if return_text:
+                    text_content = markdown_text
+                logger.info(f"Found markdown file: {os.path.basename(markdown_file)}")
+            
+            if json_file:
+                if return_text and not text_content:
+                    raw_json = read_output(json_file)
+                    try:
+                        text_content = _json_loads(raw_json).get('text', '')
+                    except json.JSONDecodeError:
+                        # If JSON is invalid, just read as text
+                        text_content = raw_json
+                logger.info(f"Found JSON file: {os.path.basename(json_file)}")
+            
+            if html_file:
+                logger.info(f"Found HTML file: {os.path.basename(html_file)}")
             
             # If we still didn't find any output files, create a basic one for the requested format
             if not markdown_file and not json_file and not html_file:
                 logger.warning(f"No output files found after processing {input_path}")
                 
                 # Create a minimal output file based on requested format
-                input_name = Path(input_path).stem
                 if output_format == "json":
-                    json_file = str(output_path / f"{input_name}.json")
+                    json_file = os.path.join(output_dir, f"{input_name}.json")
                     json_content = {"text": "OCR processing produced no output", "error": "No text extracted"}
-                    with open(json_file, 'w', encoding='utf-8') as f:
-                        json.dump(json_content, f, indent=2)
+                    with open(json_file, 'wb') as f:
+                        f.write(_json_dumps(json_content, indent=True))
                     text_content = "OCR processing produced no output"
                     logger.info(f"Created fallback JSON file: {json_file}")
                 else:
                     # Default to markdown for any other format
-                    markdown_file = str(output_path / f"{input_name}.md")
+                    markdown_file = os.path.join(output_dir, f"{input_name}.md")
                     text_content = "OCR processing produced no output"
                     with open(markdown_file, 'w', encoding='utf-8') as f:
                         f.write(text_content)
                     logger.info(f"Created fallback Markdown file: {markdown_file}")
             
-            # Find extracted images - use a more targeted approach
-            images = []
+            # Without the text, report the size of the output it would have come from
+            if return_text:
+                text_length = len(text_content)
+            else:
+                text_file = markdown_file or json_file
+                text_length = os.path.getsize(text_file) if text_file else 0
             
-            # Define likely image locations
-            image_locations = [
-                output_path,                          # Direct in output directory
-                output_path / "images",               # In images directory
-                output_path / input_name,             # In document-specific directory
-                output_path / input_name / "images"   # In document's images directory
-            ]
-            
-            # Only search in these specific locations instead of recursively
-            for location in image_locations:
-                if location.exists() and location.is_dir():
-                    # Check for png images
-                    for img_path in location.glob("*.png"):
-                        if img_path.is_file():
-                            images.append(str(img_path))
+            # Find extracted images in the likely locations, from the listings:
+            # the output dir, its images dir, the document dir and its images dir.
+            # Without extraction Marker ran with --disable_image_extraction (and
+            # the native path saves none), so there is nothing to look for
+            images = []
+            if extract_images:
+                for subdir in ("", "images", input_name, doc_images):
+                    files = listings.get(subdir, ({},))[0]
+                    images = [path for name, path in files.items() if name.endswith(IMAGE_SUFFIXES)]
                     
-                    # Check for jpg images
-                    for img_path in location.glob("*.jpg"):
-                        if img_path.is_file():
-                            images.append(str(img_path))
-                            
                     # If we found images in this location, no need to check others
                     if images:
                         break
             
             # Generate additional formats only if explicitly requested
             pdf_file = None
-            input_name = Path(input_path).stem
+            make_pdf = output_format == "pdf" or generate_pdf
+            if make_pdf and _weasyprint() is None:
+                # Skip the markdown -> HTML detour too; there's nothing to render it
+                make_pdf = False
             
             # Organize output files by format if requested
+            pdf_output_dir = html_output_dir = output_dir
             if organized_output:
                 # Create format-specific directories only if needed
-                if output_format == "pdf":
-                    pdf_dir = Path(output_dir) / "pdf"
-                    pdf_dir.mkdir(exist_ok=True)
+                if make_pdf:
+                    pdf_output_dir = os.path.join(output_dir, "pdf")
+                    os.makedirs(pdf_output_dir, exist_ok=True)
                     
-                if output_format == "html" or output_format == "pdf":
-                    html_dir = Path(output_dir) / "html"
-                    html_dir.mkdir(exist_ok=True)
+                if output_format == "html":
+                    html_output_dir = os.path.join(output_dir, "html")
+                    os.makedirs(html_output_dir, exist_ok=True)
             
             # Only generate PDF if specifically requested
-            if output_format == "pdf":
+            if make_pdf:
                 if html_file:
                     # Use existing HTML file
-                    pdf_output_dir = str(Path(output_dir) / "pdf") if organized_output else output_dir
                     pdf_file = self._generate_pdf_from_html(html_file, pdf_output_dir, input_name)
                 elif markdown_file:
-                    # Convert markdown to HTML then to PDF
-                    html_output_dir = str(Path(output_dir) / "html") if organized_output else output_dir
-                    temp_html = self._markdown_to_html(markdown_file, html_output_dir, input_name)
-                    if temp_html:
-                        pdf_output_dir = str(Path(output_dir) / "pdf") if organized_output else output_dir
-                        pdf_file = self._generate_pdf_from_html(temp_html, pdf_output_dir, input_name)
+                    # Convert markdown to HTML in memory, then to PDF
+                    pdf_file = self._generate_pdf_from_markdown(
+                        markdown_file, pdf_output_dir, input_name, markdown_text
+                    )
             
             # Only generate HTML if not already created and specifically needed
             if not html_file and output_format == "html" and markdown_file:
-                html_output_dir = str(Path(output_dir) / "html") if organized_output else output_dir
-                html_file = self._markdown_to_html(markdown_file, html_output_dir, input_name)
+                html_file = self._markdown_to_html(
+                    markdown_file, html_output_dir, input_name, markdown_text
+                )
             
-            # Clean up files that weren't requested
+            # Clean up files that weren't requested, in one pass
+            unrequested = []
             if output_format != "json" and json_file:
-                try:
-                    Path(json_file).unlink()
-                    logger.info(f"Removed unrequested JSON file: {json_file}")
-                    json_file = None
-                except Exception as e:
-                    logger.warning(f"Error removing JSON file: {e}")
-                    
+                unrequested.append(json_file)
+                json_file = None
             if output_format != "html" and output_format != "pdf" and html_file:
-                try:
-                    Path(html_file).unlink()
-                    logger.info(f"Removed unrequested HTML file: {html_file}")
-                    html_file = None
-                except Exception as e:
-                    logger.warning(f"Error removing HTML file: {e}")
-            
-            # If extract_images is False but images were extracted anyway, clean them up
-            if not extract_images and images:
-                # First filter out the original input file from the images list
-                input_path_str = str(Path(input_path))
-                filtered_images = [img for img in images if img != input_path_str]
-                
-                # Now remove only the extracted images, not the input file
-                for img_path in filtered_images:
-                    try:
-                        Path(img_path).unlink()
-                        logger.info(f"Removed unrequested image: {img_path}")
-                    except Exception as e:
-                        logger.warning(f"Error removing image file: {e}")
-                
-                # Clear the images list
-                images = []
+                unrequested.append(html_file)
+                html_file = None
             
-            return {
+            _remove_unrequested(unrequested)
+            
+            outputs = {
                 "success": True,
-                "text": text_content,
+                "text_length": text_length,
                 "markdown_file": markdown_file,
                 "json_file": json_file,
                 "html_file": html_file,
@@ -430,197 +1386,206 @@ class MarkerOCR:
                 "metadata": {
                     "input_file": input_path,
                     "output_dir": output_dir,
-                    "pages_processed": "CLI",
+                    "pages_processed": pages_processed,
                     "images_extracted": len(images)
                 }
             }
+            if return_text:
+                outputs["text"] = text_content
+            return outputs
             
-        except subprocess.TimeoutExpired:
-            return {
-                "success": False,
-                "error": "Conversion timed out (5 minutes)"
-            }
         except Exception as e:
             return {
                 "success": False,
-                "error": f"CLI conversion failed: {str(e)}"
+                "error": f"Marker conversion failed: {str(e)}"
             }
 
+    def _marker_options(self, output_dir: str, output_format: str,
+                        extract_images: bool, max_pages: Optional[int],
+                        use_llm: bool, llm_service: Optional[str],
+                        ollama_base_url: Optional[str], ollama_model: Optional[str],
+                        gemini_api_key: Optional[str], gemini_model: Optional[str]) -> Dict[str, Any]:
+        """Build Marker options keyed by CLI flag name (True marks a bare flag)."""
+        options: Dict[str, Any] = {"output_dir": output_dir}
+        
+        # Add output format - ONLY generate the requested format
+        if output_format in ("json", "html"):
+            options["output_format"] = output_format
+        elif output_format == "pdf":
+            # weasyprint renders Marker's HTML directly, skipping markdown -> HTML
+            options["output_format"] = "html"
+        else:  # default to markdown
+            options["output_format"] = "markdown"
+        
+        # Add image extraction setting
+        if not extract_images:
+            options["disable_image_extraction"] = True
+        
+        # Add page range if specified
+        if max_pages:
+            options["page_range"] = f"0-{max_pages-1}"
+        
+        # Add LLM support if enabled
+        if use_llm:
+            options["use_llm"] = True
+            llm_options = {
+                "llm_service": llm_service,
+                "OllamaService_ollama_base_url": ollama_base_url,
+                "OllamaService_ollama_model": ollama_model,
+                "GoogleGeminiService_gemini_api_key": gemini_api_key,
+                "GoogleGeminiService_gemini_model_name": gemini_model
+            }
+            options.update((key, value) for key, value in llm_options.items() if value)
+        
+        return options
+
+    def _convert_native(self, input_path: str, options: Dict[str, Any]) -> Tuple[int, Tuple[str, str]]:
+        """
+        Convert a file with the Marker Python API using the resident models.
+        
+        Outputs are saved to the same place marker_single would write them
+        (output_dir/<input name>/), so output discovery works for both paths.
+        Unlike marker_single, only the requested outputs are written: no
+        _meta.json (it would only be deleted again) and no images when image
+        extraction is disabled.
+        
+        Returns:
+            Tuple of (number of pages processed, (output file path, its text)),
+            so the caller needn't read the output back
+        """
+        from marker.config.parser import ConfigParser
+        from marker.output import text_from_rendered
+        from marker.settings import settings
+        
+        config_parser = ConfigParser(options)
+        converter = self._get_converter(config_parser, options)
+        with self._inference_lock, self._inference_context():
+            rendered = converter(input_path)
+        
+        output_folder = config_parser.get_output_folder(input_path)
+        base_name = config_parser.get_base_filename(input_path)
+        text, ext, images = text_from_rendered(rendered)
+        output_file = os.path.normpath(os.path.join(output_folder, f"{base_name}.{ext}"))
+        with open(output_file, 'w', encoding=settings.OUTPUT_ENCODING, errors='replace') as f:
+            f.write(text)
+        if not options.get("disable_image_extraction"):
+            for image_name, image in images.items():
+                if image.mode != "RGB":
+                    image = image.convert("RGB")
+                image.save(os.path.join(output_folder, image_name), settings.OUTPUT_IMAGE_FORMAT)
+        return len(rendered.metadata.get("page_stats", [])), (output_file, text)
+
+    def _inference_dtype(self):
+        """Half precision for GPU inference: bfloat16 where supported, else float16."""
+        if not self.use_gpu or not HALF_PRECISION:
+            return None
+        import torch
+        return torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+
+    def _inference_context(self):
+        """Disable autograd, and autocast to the model dtype on GPU, around a conversion."""
+        if not self.use_gpu:
+            return contextlib.nullcontext()
+        import torch
+        stack = contextlib.ExitStack()
+        stack.enter_context(torch.inference_mode())
+        if self.dtype is not None:
+            stack.enter_context(torch.autocast("cuda", dtype=self.dtype))
+        return stack
+
+    def _get_converter(self, config_parser, options: Dict[str, Any]):
+        """Return a cached PdfConverter for these options, building it on first use."""
+        from marker.converters.pdf import PdfConverter
+        
+        # The output directory only affects where results are saved, not the converter
+        key = tuple(sorted((k, str(v)) for k, v in options.items() if k != "output_dir"))
+        with self._converters_lock:
+            converter = self._converters.get(key)
+            if converter is None:
+                converter = PdfConverter(
+                    config=config_parser.generate_config_dict(),
+                    artifact_dict=self.models,
+                    processor_list=config_parser.get_processors(),
+                    renderer=config_parser.get_renderer(),
+                    llm_service=config_parser.get_llm_service()
+                )
+                self._converters[key] = converter
+                if len(self._converters) > MAX_CACHED_CONVERTERS:
+                    self._converters.popitem(last=False)
+            else:
+                self._converters.move_to_end(key)
+            return converter
+
     def _generate_pdf_from_html(self, html_file: str, output_dir: str, base_name: str) -> Optional[str]:
-        """Generate PDF from HTML file using weasyprint."""
+        """Generate PDF from HTML file using weasyprint, in the PDF worker pool."""
+        if not os.path.exists(html_file):
+            logger.error(f"HTML file not found: {html_file}")
+            return None
+        return self._write_pdf({"filename": html_file}, output_dir, base_name)
+
+    def _generate_pdf_from_markdown(self, markdown_file: str, output_dir: str, base_name: str,
+                                    markdown_text: Optional[str] = None) -> Optional[str]:
+        """Generate PDF from a markdown file, passing the HTML to weasyprint in memory."""
+        full_html = self._markdown_document(markdown_file, base_name, markdown_text)
+        if full_html is None:
+            return None
+        # Relative image links resolve against the markdown file, as they would in a saved copy
+        return self._write_pdf(
+            {"string": full_html, "base_url": os.path.dirname(os.path.abspath(markdown_file))},
+            output_dir, base_name
+        )
+
+    def _write_pdf(self, source: Dict[str, str], output_dir: str, base_name: str) -> Optional[str]:
+        """Render output_dir/<base_name>.pdf from weasyprint.HTML arguments."""
+        if _weasyprint() is None:
+            return None
+        
         try:
-            from weasyprint import HTML, CSS
-            from pathlib import Path
-            
-            html_path = Path(html_file)
-            if not html_path.exists():
-                logger.error(f"HTML file not found: {html_file}")
-                return None
-            
             # Output PDF path
             pdf_path = Path(output_dir) / f"{base_name}.pdf"
             
-            # Create simple CSS for better PDF formatting
-            css_style = CSS(string='''
-                @page {
-                    margin: 1in;
-                    size: letter;
-                }
-                body {
-                    font-family: "Times New Roman", serif;
-                    font-size: 12pt;
-                    line-height: 1.5;
-                    color: #000;
-                }
-                h1, h2, h3, h4, h5, h6 {
-                    color: #333;
-                    margin-top: 1em;
-                    margin-bottom: 0.5em;
-                }
-                table {
-                    border-collapse: collapse;
-                    width: 100%;
-                    margin: 1em 0;
-                }
-                th, td {
-                    border: 1px solid #ddd;
-                    padding: 8px;
-                    text-align: left;
-                }
-                th {
-                    background-color: #f5f5f5;
-                }
-                img {
-                    max-width: 100%;
-                    height: auto;
-                }
-                code {
-                    background-color: #f5f5f5;
-                    padding: 2px 4px;
-                    border-radius: 3px;
-                    font-family: monospace;
-                }
-                pre {
-                    background-color: #f5f5f5;
-                    padding: 1em;
-                    border-radius: 5px;
-                    overflow-x: auto;
-                }
-            ''')
-            
             # Generate PDF
-            HTML(filename=str(html_path)).write_pdf(
-                str(pdf_path),
-                stylesheets=[css_style]
-            )
+            _render_pdf_pooled(source, str(pdf_path))
             
             logger.info(f"✅ PDF generated successfully: {pdf_path.name}")
             return str(pdf_path)
             
-        except ImportError:
-            logger.warning("⚠️ weasyprint not available - cannot generate PDF")
-            return None
         except Exception as e:
             logger.error(f"❌ PDF generation failed: {str(e)}")
             return None
 
-    def _markdown_to_html(self, markdown_file: str, output_dir: str, base_name: str) -> Optional[str]:
-        """Convert markdown to HTML for PDF generation."""
+    def _markdown_document(self, markdown_file: str, base_name: str,
+                           markdown_text: Optional[str] = None) -> Optional[str]:
+        """Render a markdown file (or its already-read text) as a standalone HTML document."""
+        if not _HAS_MARKDOWN:
+            return None
+        
         try:
-            try:
-                import markdown
-            except ImportError:
-                logger.warning("⚠️ markdown library not available - installing...")
-                import subprocess
-                subprocess.check_call(['pip', 'install', 'markdown'])
-                import markdown
-            
-            from pathlib import Path
-            
-            md_path = Path(markdown_file)
-            if not md_path.exists():
-                logger.error(f"Markdown file not found: {markdown_file}")
-                return None
-            
-            # Read markdown content
-            with open(md_path, 'r', encoding='utf-8') as f:
-                md_content = f.read()
-            
-            # Convert to HTML
-            md = markdown.Markdown(extensions=['tables', 'codehilite', 'toc'])
-            html_content = md.convert(md_content)
-            
-            # Create full HTML document
-            full_html = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{base_name}</title>
-    <style>
-        body {{
-            font-family: "Times New Roman", serif;
-            font-size: 12pt;
-            line-height: 1.6;
-            max-width: 800px;
-            margin: 0 auto;
-            padding: 1em;
-            color: #333;
-        }}
-        h1, h2, h3, h4, h5, h6 {{
-            color: #222;
-            margin-top: 1.5em;
-            margin-bottom: 0.5em;
-        }}
-        table {{
-            border-collapse: collapse;
-            width: 100%;
-            margin: 1em 0;
-        }}
-        th, td {{
-            border: 1px solid #ddd;
-            padding: 8px;
-            text-align: left;
-        }}
-        th {{
-            background-color: #f5f5f5;
-            font-weight: bold;
-        }}
-        code {{
-            background-color: #f5f5f5;
-            padding: 2px 4px;
-            border-radius: 3px;
-            font-family: 'Courier New', monospace;
-            font-size: 0.9em;
-        }}
-        pre {{
-            background-color: #f5f5f5;
-            padding: 1em;
-            border-radius: 5px;
-            overflow-x: auto;
-        }}
-        pre code {{
-            background: none;
-            padding: 0;
-        }}
-        blockquote {{
-            border-left: 4px solid #ddd;
-            margin: 1em 0;
-            padding-left: 1em;
-            color: #666;
-        }}
-        img {{
-            max-width: 100%;
-            height: auto;
-            margin: 1em 0;
-        }}
-    </style>
-</head>
-<body>
-{html_content}
-</body>
-</html>"""
+            if markdown_text is None:
+                if not os.path.exists(markdown_file):
+                    logger.error(f"Markdown file not found: {markdown_file}")
+                    return None
+                # Large files are decoded straight from a memory map
+                markdown_text = _read_text(markdown_file)
+            
+            # Convert to HTML and create full HTML document
+            return _render_html_document(base_name, _convert_markdown(markdown_text))
             
+        except ImportError:
+            logger.warning("⚠️ markdown library not available - cannot convert MD to HTML (pip install markdown)")
+            return None
+        except Exception as e:
+            logger.error(f"❌ Markdown to HTML conversion failed: {str(e)}")
+            return None
+
+    def _markdown_to_html(self, markdown_file: str, output_dir: str, base_name: str,
+                          markdown_text: Optional[str] = None) -> Optional[str]:
+        """Convert markdown to a standalone HTML file."""
+        full_html = self._markdown_document(markdown_file, base_name, markdown_text)
+        if full_html is None:
+            return None
+        
+        try:
             # Save HTML file
             html_path = Path(output_dir) / f"{base_name}_temp.html"
             with open(html_path, 'w', encoding='utf-8') as f:
@@ -629,15 +1594,12 @@ class MarkerOCR:
             logger.info(f"✅ Markdown converted to HTML: {html_path.name}")
             return str(html_path)
             
-        except ImportError:
-            logger.warning("⚠️ markdown library not available - cannot convert MD to HTML")
-            return None
         except Exception as e:
             logger.error(f"❌ Markdown to HTML conversion failed: {str(e)}")
             return None
 
     def _load_models(self):
-        """Load Marker models with error handling (CLI-based approach)."""
+        """Load Marker models once for in-process conversion, falling back to the CLI."""
         if self.models_loaded:
             return True
             
@@ -645,12 +1607,37 @@ class MarkerOCR:
             logger.error("Marker is not available. Cannot load models.")
             return False
         
+        if self._workers:
+            # Each worker process loads its own models as it starts, all at once;
+            # the first job sent to a worker waits for it to be ready
+            for worker in self._workers:
+                worker.start()
+            self.models_loaded = True
+            return True
+        
+        if self.use_gpu:
+            try:
+                _export_gpu_settings()
+            except Exception as e:
+                logger.warning(f"⚠️ Could not export GPU settings, using Marker's defaults: {e}")
+        
+        # Keep the models resident so each conversion skips interpreter and model startup;
+        # instances on the same device share one copy
+        try:
+            self.dtype = self._inference_dtype()
+            device = None if self.use_gpu else "cpu"
+            self.models = _get_or_load_models(device, self.dtype)
+            self._inference_lock = _inference_lock(device, self.dtype)
+            self.models_loaded = True
+            logger.info("✅ Marker models loaded")
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Marker Python API unavailable, using the CLI: {e}")
+            self.models = None
+        
         # For CLI approach, we just test that marker_single works
         try:
-            import subprocess
-            result = subprocess.run(['marker_single', '--help'], 
-                                  capture_output=True, text=True, timeout=10)
-            if result.returncode == 0:
+            if _probe_marker_cli():
                 self.models_loaded = True
                 logger.info("✅ Marker CLI is ready")
                 return True
@@ -664,7 +1651,11 @@ class MarkerOCR:
             return False
     
     def is_ready(self) -> bool:
-        """Check if Marker is ready for use."""
+        """Check if Marker is ready for use, waiting for a background warmup to finish."""
+        warmup_thread = self._warmup_thread
+        if warmup_thread is not None:
+            warmup_thread.join()
+            self._warmup_thread = None
         return self.available and (self.models_loaded or self._load_models())
     
     def convert_pdf(self, 
@@ -690,49 +1681,98 @@ class MarkerOCR:
             output_format: Output format ("markdown", "json", "html")
             extract_images: Whether to extract and save images
             max_pages: Maximum number of pages to process (None for all)
-            **kwargs: Additional arguments (for LLM support)
+            **kwargs: Additional arguments (LLM support; return_text=False skips
+                reading the output text and reports its file size as text_length;
+                generate_pdf=True also renders a PDF for non-"pdf" formats;
+                load_images=True adds "image_data", read-only memory maps of the
+                extracted images in the order of "images", for the caller to close;
+                timeout_base/timeout_per_page override the CLI timeout budget in seconds)
             
         Returns:
             Dictionary with conversion results and metadata
         """
+        error, pdf_path, output_dir = self._prepare_conversion(pdf_path, output_dir)
+        if error:
+            return error
+        
+        try:
+            logger.info(f"🔄 Converting file: {pdf_path.name}")
+            
+            # Use CLI to convert the file
+            result = self._convert_with_cli(
+                str(pdf_path),
+                str(output_dir),
+                **self._conversion_options(output_format, extract_images, max_pages, kwargs)
+            )
+            return self._build_results(
+                result, pdf_path, output_dir, extract_images, kwargs.get('load_images', False)
+            )
+            
+        except Exception as e:
+            return self._conversion_failed(e, pdf_path)
+    
+    async def convert_pdf_async(self, 
+                                pdf_path: Union[str, Path], 
+                                output_dir: Optional[Union[str, Path]] = None,
+                                output_format: str = "markdown",
+                                extract_images: bool = True,
+                                max_pages: Optional[int] = None,
+                                **kwargs) -> Dict[str, Any]:
+        """Async counterpart of convert_pdf; the Marker CLI runs as an asyncio subprocess."""
+        error, pdf_path, output_dir = await asyncio.to_thread(
+            self._prepare_conversion, pdf_path, output_dir
+        )
+        if error:
+            return error
+        
+        try:
+            logger.info(f"🔄 Converting file: {pdf_path.name}")
+            result = await self._convert_with_cli_async(
+                str(pdf_path),
+                str(output_dir),
+                **self._conversion_options(output_format, extract_images, max_pages, kwargs)
+            )
+            return self._build_results(
+                result, pdf_path, output_dir, extract_images, kwargs.get('load_images', False)
+            )
+            
+        except Exception as e:
+            return self._conversion_failed(e, pdf_path)
+    
+    def _prepare_conversion(self, pdf_path: Union[str, Path],
+                            output_dir: Optional[Union[str, Path]]):
+        """
+        Validate an input file and create its output directory.
+        
+        Returns:
+            Tuple of (error result or None, input path, output directory)
+        """
         # Validation
         if not self.available:
             return {
                 "success": False,
                 "error": "Marker OCR is not installed. Please run: pip install marker-pdf[full]"
-            }
+            }, None, None
         
         if not self.is_ready():
             return {
                 "success": False,
                 "error": "Failed to load Marker models"
-            }
+            }, None, None
         
         pdf_path = Path(pdf_path)
         if not pdf_path.exists():
             return {
                 "success": False,
                 "error": f"PDF file not found: {pdf_path}"
-            }
+            }, None, None
         
         # Check if file is supported format
-        supported_extensions = {
-            # PDF
-            '.pdf',
-            # Images  
-            '.jpg', '.jpeg', '.png', '.webp', '.tiff', '.tif', '.bmp',
-            # Microsoft Office
-            '.docx', '.pptx', '.xlsx',
-            # E-books
-            '.epub', '.mobi',
-            # Web
-            '.html', '.htm'
-        }
-        if pdf_path.suffix.lower() not in supported_extensions:
+        if pdf_path.suffix.lower() not in SUPPORTED_EXTENSIONS:
             return {
                 "success": False,
-                "error": f"Unsupported file format: {pdf_path}. Supported formats: PDF, images (JPG/PNG/WebP/TIFF/BMP), Office (DOCX/PPTX/XLSX), E-books (EPUB/MOBI), HTML"
-            }
+                "error": f"Unsupported file format: {pdf_path}. {_SUPPORTED_FORMATS_HINT}"
+            }, None, None
         
         # Setup output directory
         if output_dir is None:
@@ -741,127 +1781,507 @@ class MarkerOCR:
             output_dir = Path(output_dir)
         
         output_dir.mkdir(exist_ok=True)
+        return None, pdf_path, output_dir
+    
+    def _conversion_options(self, output_format: str, extract_images: bool,
+                            max_pages: Optional[int], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Keyword arguments for _convert_with_cli from convert_pdf's arguments."""
+        return {
+            "output_format": output_format,
+            "extract_images": extract_images,
+            "max_pages": max_pages,
+            "use_llm": kwargs.get('use_llm', False),
+            "llm_service": kwargs.get('llm_service'),
+            "ollama_base_url": kwargs.get('ollama_base_url'),
+            "ollama_model": kwargs.get('ollama_model'),
+            "gemini_api_key": kwargs.get('gemini_api_key'),
+            "gemini_model": kwargs.get('gemini_model'),
+            "images_dir": kwargs.get('images_dir'),
+            "organized_output": kwargs.get('organized_output', False),
+            "return_text": kwargs.get('return_text', True),
+            "generate_pdf": kwargs.get('generate_pdf', False),
+            "timeout_base": kwargs.get('timeout_base'),
+            "timeout_per_page": kwargs.get('timeout_per_page')
+        }
+    
+    def _build_results(self, result: Dict[str, Any], pdf_path: Path,
+                       output_dir: Path, extract_images: bool,
+                       load_images: bool = False) -> Dict[str, Any]:
+        """Shape a _convert_with_cli result into convert_pdf's result dictionary."""
+        if not result["success"]:
+            return result
         
-        try:
-            logger.info(f"🔄 Converting file: {pdf_path.name}")
-            
-            # Use CLI to convert the file
-            result = self._convert_with_cli(
-                str(pdf_path),
-                str(output_dir),
-                output_format=output_format,
-                extract_images=extract_images,
-                max_pages=max_pages,
-                use_llm=kwargs.get('use_llm', False),
-                llm_service=kwargs.get('llm_service'),
-                ollama_base_url=kwargs.get('ollama_base_url'),
-                ollama_model=kwargs.get('ollama_model'),
-                gemini_api_key=kwargs.get('gemini_api_key'),
-                gemini_model=kwargs.get('gemini_model'),
-                images_dir=kwargs.get('images_dir'),
-                organized_output=kwargs.get('organized_output', False)
-            )
-            
-            if not result["success"]:
-                return result
-            
-            full_text = result["text"]
-            images = result.get("images", [])
-            metadata = result.get("metadata", {})
-            
-            results = {
-                "success": True,
-                "pdf_file": str(pdf_path),
-                "output_dir": str(output_dir),
-                "text_length": len(full_text),
-                "num_images": len(images) if images else 0,
-                "metadata": metadata
-            }
-            
-            # Use the files that Marker CLI already created - don't create duplicates
-            if result.get("markdown_file"):
-                results["markdown_file"] = result["markdown_file"]
-            if result.get("json_file"):
-                results["json_file"] = result["json_file"]
-            if result.get("html_file"):
-                results["html_file"] = result["html_file"]
-            if result.get("pdf_file"):
-                results["pdf_file"] = result["pdf_file"]
-            
-            # Handle extracted images (CLI returns file paths, not PIL objects)
-            if extract_images and images:
-                results["images"] = images
-                if images:
-                    logger.info(f"🖼️ Images found: {len(images)} images")
-            
-            # Add text content for immediate access
+        full_text = result.get("text")
+        images = result.get("images", [])
+        metadata = result.get("metadata", {})
+        
+        results = {
+            "success": True,
+            "pdf_file": str(pdf_path),
+            "output_dir": str(output_dir),
+            "text_length": result["text_length"],
+            "num_images": len(images) if images else 0,
+            "metadata": metadata
+        }
+        
+        # Use the files that Marker CLI already created - don't create duplicates
+        if result.get("markdown_file"):
+            results["markdown_file"] = result["markdown_file"]
+        if result.get("json_file"):
+            results["json_file"] = result["json_file"]
+        if result.get("html_file"):
+            results["html_file"] = result["html_file"]
+        if result.get("pdf_file"):
+            results["pdf_file"] = result["pdf_file"]
+        
+        # Handle extracted images (CLI returns file paths, not PIL objects)
+        if extract_images and images:
+            results["images"] = images
+            if images:
+                logger.info(f"🖼️ Images found: {len(images)} images")
+            if load_images:
+                results["image_data"] = _map_images(images)
+        
+        # Add text content for immediate access
+        if full_text is not None:
             results["text"] = full_text
-            
-            logger.info(f"✅ Conversion completed: {pdf_path.name}")
-            return results
-            
-        except Exception as e:
-            error_msg = f"PDF conversion failed: {str(e)}"
-            logger.error(f"❌ {error_msg}")
-            return {
-                "success": False,
-                "error": error_msg,
-                "pdf_file": str(pdf_path)
-            }
+        
+        logger.info(f"✅ Conversion completed: {pdf_path.name}")
+        return results
+    
+    def _conversion_failed(self, error: Exception, pdf_path: Path) -> Dict[str, Any]:
+        """Result for a conversion that raised."""
+        error_msg = f"PDF conversion failed: {str(error)}"
+        logger.error(f"❌ {error_msg}")
+        return {
+            "success": False,
+            "error": error_msg,
+            "pdf_file": str(pdf_path)
+        }
     
     def convert_multiple(self, 
                         pdf_paths: List[Union[str, Path]], 
                         output_dir: Optional[Union[str, Path]] = None,
+                        max_workers: Optional[int] = None,
                         **kwargs) -> List[Dict[str, Any]]:
         """
-        Convert multiple PDF files.
+        Convert multiple PDF files in parallel.
+        
+        On GPU, files are spread across worker processes started with spawn,
+        since CUDA cannot be used after fork, and each loads its own copy of
+        the models; keep max_workers around VRAM / model size to avoid running
+        out of memory. In CPU mode, threads share this instance's models:
+        conversions on them run one at a time, while the threads overlap
+        reading inputs and rendering and writing outputs.
         
         Args:
             pdf_paths: List of PDF file paths
             output_dir: Base output directory
+            max_workers: Parallel conversions, at most len(pdf_paths) (default as
+                many model copies as fit in free VRAM, up to 5, on GPU; half the
+                CPU cores in CPU mode; 1, or a single file, converts serially in
+                this process without starting a pool)
             **kwargs: Additional arguments passed to convert_pdf
             
         Returns:
-            List of conversion results
+            List of conversion results, in the order of pdf_paths
         """
-        results = []
+        results: List[Optional[Dict[str, Any]]] = [None] * len(pdf_paths)
+        for index, result in self.convert_multiple_iter(pdf_paths, output_dir, max_workers, **kwargs):
+            results[index] = result
+        return results
+    
+    def convert_multiple_iter(self, 
+                              pdf_paths: List[Union[str, Path]], 
+                              output_dir: Optional[Union[str, Path]] = None,
+                              max_workers: Optional[int] = None,
+                              **kwargs) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Convert multiple PDF files in parallel, yielding each result as it finishes.
+        
+        Works like convert_multiple, but only the results the caller keeps stay
+        in memory. Serial conversions run as the caller iterates.
         
-        for pdf_path in pdf_paths:
-            logger.info(f"🔄 Processing {Path(pdf_path).name} ({len(results)+1}/{len(pdf_paths)})")
+        Args:
+            pdf_paths, output_dir, max_workers, **kwargs: As for convert_multiple
             
-            # Create individual output directory for each PDF
-            if output_dir:
-                pdf_output_dir = Path(output_dir) / Path(pdf_path).stem
+        Yields:
+            (index, result) pairs in completion order, index being the file's
+            position in pdf_paths
+        """
+        # Create individual output directory for each PDF
+        tasks = [
+            (str(pdf_path), str(Path(output_dir) / Path(pdf_path).stem) if output_dir else None)
+            for pdf_path in pdf_paths
+        ]
+        if not max_workers:
+            max_workers = self._default_batch_workers()
+            if self.use_gpu:
+                # Each spawned worker loads its own models; start only as many as fit
+                max_workers = min(5, max_workers)
+        max_workers = min(max_workers, len(tasks))
+        successful = 0
+        
+        if max_workers <= 1:
+            for index, (pdf_path, pdf_output_dir) in enumerate(tasks):
+                logger.info(f"🔄 Processing {Path(pdf_path).name} ({index+1}/{len(tasks)})")
+                result = self.convert_pdf(pdf_path, pdf_output_dir, **kwargs)
+                self._log_batch_result(pdf_path, result)
+                successful += result["success"]
+                yield index, result
+        else:
+            logger.info(f"🔄 Processing {len(tasks)} files with {max_workers} workers")
+            if self.use_gpu and not self._workers:
+                executor = ProcessPoolExecutor(
+                    max_workers=max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_convert_worker,
+                    # This process's own models, if loaded, share the GPU as well
+                    initargs=(self.use_gpu, max_workers + (self.models is not None))
+                )
+                # Memory maps can't be sent between processes; map images here instead
+                map_images = kwargs.get('load_images', False)
+                kwargs = {k: v for k, v in kwargs.items() if k != 'load_images'}
+                submit = functools.partial(executor.submit, _convert_worker)
             else:
-                pdf_output_dir = None
+                # Load models (or start the persistent workers) before the threads
+                # start so they don't all race to do it
+                self.is_ready()
+                if self.models is None and not self._workers:
+                    # CLI fallback: each file is its own process already, so
+                    # drive the subprocesses from an event loop instead of threads.
+                    # Each loads its own models, so on GPU run only as many as fit
+                    if self.use_gpu:
+                        max_workers = min(max_workers, self._default_batch_workers())
+                    for index, result in self._iter_conversions_async(tasks, max_workers, kwargs):
+                        successful += result["success"]
+                        yield index, result
+                    logger.info(f"📊 Batch conversion complete: {successful}/{len(tasks)} successful")
+                    return
+                executor = ThreadPoolExecutor(max_workers=max_workers)
+                submit = functools.partial(executor.submit, _convert_worker, ocr=self)
+                map_images = False
             
-            result = self.convert_pdf(pdf_path, pdf_output_dir, **kwargs)
-            results.append(result)
+            with executor:
+                futures = {
+                    submit(pdf_path, pdf_output_dir, kwargs): index
+                    for index, (pdf_path, pdf_output_dir) in enumerate(tasks)
+                }
+                for future in as_completed(futures):
+                    index = futures.pop(future)
+                    pdf_path = tasks[index][0]
+                    try:
+                        result = future.result()
+                        if map_images and result.get("images"):
+                            result["image_data"] = _map_images(result["images"])
+                    except Exception as e:
+                        result = {
+                            "success": False,
+                            "error": f"Worker failed: {str(e)}",
+                            "pdf_file": pdf_path
+                        }
+                    self._log_batch_result(pdf_path, result)
+                    successful += result["success"]
+                    yield index, result
+        
+        # Summary
+        logger.info(f"📊 Batch conversion complete: {successful}/{len(tasks)} successful")
+    
+    def _iter_conversions_async(self, tasks: List[Tuple[str, Optional[str]]], max_parallel: int,
+                                kwargs: Dict[str, Any]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Run convert_multiple_iter's tasks with convert_pdf_async on a private event loop."""
+        loop = asyncio.new_event_loop()
+        semaphore = asyncio.Semaphore(max_parallel)
+        
+        async def convert_one(index: int, pdf_path: str, pdf_output_dir: Optional[str]):
+            async with semaphore:
+                result = await self.convert_pdf_async(pdf_path, pdf_output_dir, **kwargs)
+            self._log_batch_result(pdf_path, result)
+            return index, result
+        
+        pending = {
+            loop.create_task(convert_one(index, pdf_path, pdf_output_dir))
+            for index, (pdf_path, pdf_output_dir) in enumerate(tasks)
+        }
+        try:
+            while pending:
+                done, pending = loop.run_until_complete(
+                    asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                )
+                for task in done:
+                    yield task.result()
+        finally:
+            # The caller stopped early: cancel what's left before closing the loop
+            for task in pending:
+                task.cancel()
+            if pending:
+                loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.close()
+    
+    async def convert_multiple_async(self, 
+                                     pdf_paths: List[Union[str, Path]], 
+                                     output_dir: Optional[Union[str, Path]] = None,
+                                     max_parallel: Optional[int] = None,
+                                     **kwargs) -> List[Dict[str, Any]]:
+        """
+        Convert multiple files concurrently from an event loop.
+        
+        Args:
+            pdf_paths: List of PDF file paths
+            output_dir: Base output directory
+            max_parallel: Conversions running at once (default: as many Marker
+                processes as fit in free VRAM on GPU, half the CPU cores otherwise)
+            **kwargs: Additional arguments passed to convert_pdf_async
             
-            if result["success"]:
-                logger.info(f"✅ Completed: {Path(pdf_path).name}")
-            else:
-                logger.error(f"❌ Failed: {Path(pdf_path).name} - {result.get('error', 'Unknown error')}")
+        Returns:
+            List of conversion results, in the order of pdf_paths
+        """
+        semaphore = asyncio.Semaphore(max_parallel or self._default_batch_workers())
+        
+        async def convert_one(pdf_path: Union[str, Path]) -> Dict[str, Any]:
+            pdf_output_dir = str(Path(output_dir) / Path(pdf_path).stem) if output_dir else None
+            async with semaphore:
+                result = await self.convert_pdf_async(pdf_path, pdf_output_dir, **kwargs)
+            self._log_batch_result(str(pdf_path), result)
+            return result
+        
+        results = await asyncio.gather(*(convert_one(pdf_path) for pdf_path in pdf_paths))
         
         # Summary
         successful = sum(1 for r in results if r["success"])
         logger.info(f"📊 Batch conversion complete: {successful}/{len(results)} successful")
         
+        return list(results)
+    
+    def convert_batch(self,
+                      pdf_paths: List[Union[str, Path]],
+                      output_dir: Optional[Union[str, Path]] = None,
+                      output_format: str = "markdown",
+                      extract_images: bool = True,
+                      max_pages: Optional[int] = None,
+                      workers: Optional[int] = None,
+                      **kwargs) -> List[Dict[str, Any]]:
+        """
+        Convert multiple files with one run of Marker's batch CLI.
+        
+        When Marker's Python API is unavailable, each marker_single run loads
+        the models again; `marker <dir> --workers N` loads them once per worker
+        for the whole batch. With models resident in this process (or
+        persistent workers) this is the same as convert_multiple.
+        
+        Args:
+            pdf_paths: List of file paths; their file names must be distinct
+            output_dir: Base output directory; each file's outputs go in a
+                subdirectory named after it (default: "marker_output" next to
+                the first file)
+            output_format, extract_images, max_pages: As for convert_pdf
+            workers: Batch CLI worker processes (default: free VRAM / ~3.5 GB
+                on GPU, half the CPU cores otherwise)
+            **kwargs: Additional arguments as for convert_pdf
+            
+        Returns:
+            List of conversion results, in the order of pdf_paths
+        """
+        if not pdf_paths:
+            return []
+        if self.available and self.is_ready() and (self.models is not None or self._workers):
+            return self.convert_multiple(
+                pdf_paths, output_dir, output_format=output_format,
+                extract_images=extract_images, max_pages=max_pages, **kwargs
+            )
+        
+        if output_dir is None:
+            output_dir = Path(pdf_paths[0]).parent / "marker_output"
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Validate every input up front; only valid, uniquely named ones join the batch
+        results: List[Optional[Dict[str, Any]]] = [None] * len(pdf_paths)
+        batch: Dict[int, Tuple[Path, Path]] = {}
+        names: Set[str] = set()
+        for index, pdf_path in enumerate(pdf_paths):
+            pdf_path = Path(pdf_path)
+            if pdf_path.name in names:
+                results[index] = {
+                    "success": False,
+                    "error": f"Duplicate file name in batch: {pdf_path.name}",
+                    "pdf_file": str(pdf_path)
+                }
+                continue
+            error, pdf_path, doc_dir = self._prepare_conversion(pdf_path, output_dir / pdf_path.stem)
+            if error:
+                results[index] = error
+                continue
+            names.add(pdf_path.name)
+            batch[index] = (pdf_path, doc_dir)
+        
+        if batch:
+            options = self._conversion_options(output_format, extract_images, max_pages, kwargs)
+            result = self._run_marker_batch(
+                [pdf_path for pdf_path, _ in batch.values()], str(output_dir), options, workers
+            )
+            if result is None:
+                self._collect_batch_outputs(batch, results, options, kwargs.get('load_images', False))
+            else:
+                for index, (pdf_path, _) in batch.items():
+                    results[index] = {**result, "pdf_file": str(pdf_path)}
+        
+        for pdf_path, result in zip(pdf_paths, results):
+            self._log_batch_result(str(pdf_path), result)
+        successful = sum(1 for r in results if r["success"])
+        logger.info(f"📊 Batch conversion complete: {successful}/{len(results)} successful")
+        
         return results
     
-    def get_info(self) -> Dict[str, Any]:
-        """Get information about the Marker installation."""
-        info = {
-            "marker_available": self.available,
-            "models_loaded": self.models_loaded,
-        }
+    def _collect_batch_outputs(self, batch: Dict[int, Tuple[Path, Path]],
+                               results: List[Optional[Dict[str, Any]]],
+                               options: Dict[str, Any], load_images: bool):
+        """
+        Post-process each document of a finished batch run into results.
         
-        if self.available:
-            import marker
-            info["marker_version"] = getattr(marker, "__version__", "unknown")
-            info["marker_location"] = marker.__file__
+        Output discovery, reads, HTML/PDF rendering and cleanup are mostly
+        file I/O, so documents are handled on a thread pool; at most twice
+        the pool size are queued at once to bound memory.
+        """
+        max_workers = min(16, os.cpu_count() or 1, len(batch))
+        
+        def collect(pdf_path: Path, doc_dir: Path) -> Dict[str, Any]:
+            result = self._collect_outputs(
+                str(pdf_path), str(doc_dir), options["output_format"],
+                options["extract_images"], options["organized_output"], "CLI",
+                options["return_text"], options["generate_pdf"]
+            )
+            return self._build_results(
+                result, pdf_path, doc_dir, options["extract_images"], load_images
+            )
+        
+        pending = iter(batch.items())
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(collect, *task): index
+                for index, task in itertools.islice(pending, 2 * max_workers)
+            }
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = futures.pop(future)
+                    try:
+                        results[index] = future.result()
+                    except Exception as e:
+                        results[index] = self._conversion_failed(e, batch[index][0])
+                for next_index, task in itertools.islice(pending, len(done)):
+                    futures[executor.submit(collect, *task)] = next_index
+    
+    def _run_marker_batch(self, pdf_paths: List[Path], output_dir: str,
+                          options: Dict[str, Any], workers: Optional[int]) -> Optional[Dict[str, Any]]:
+        """
+        Run `marker` once over pdf_paths, writing to output_dir/<file stem>/.
+        
+        Returns:
+            None on success, otherwise the error result shared by the whole batch
+        """
+        if workers is None:
+            workers = self._default_batch_workers()
+        max_pages = options["max_pages"]
+        per_page = options["timeout_per_page"]
+        if per_page is None:
+            per_page = TIMEOUT_PER_PAGE_GPU if self.use_gpu else TIMEOUT_PER_PAGE_CPU
+        base = TIMEOUT_BASE if options["timeout_base"] is None else options["timeout_base"]
+        timeout = CLI_COLD_START + base + sum(
+            _estimate_timeout(str(pdf_path), max_pages, per_page, 0) for pdf_path in pdf_paths
+        )
+        
+        marker_options = self._marker_options(
+            output_dir, options["output_format"], options["extract_images"], max_pages,
+            options["use_llm"], options["llm_service"], options["ollama_base_url"],
+            options["ollama_model"], options["gemini_api_key"], options["gemini_model"]
+        )
+        
+        # The batch CLI takes a directory; link the inputs into a private one
+        with tempfile.TemporaryDirectory(prefix="marker_batch_") as input_dir:
+            for pdf_path in pdf_paths:
+                link = os.path.join(input_dir, pdf_path.name)
+                try:
+                    os.symlink(pdf_path.resolve(), link)
+                except OSError:
+                    shutil.copyfile(pdf_path, link)
+            
+            cmd = self._build_cli_command(input_dir, marker_options, binary=_MARKER_BATCH_BIN)
+            cmd += ['--workers', str(workers)]
+            logger.info(f"Running (timeout {timeout:.0f}s): {' '.join(cmd)}")
+            try:
+                returncode, stderr = _run_marker_cli(cmd, timeout=timeout)
+            except _CLIStalled as e:
+                return {
+                    "success": False,
+                    "error": f"Batch conversion stalled (no progress for {e.timeout:.0f} seconds)"
+                }
+            except subprocess.TimeoutExpired:
+                return {
+                    "success": False,
+                    "error": f"Batch conversion timed out ({timeout:.0f} seconds)"
+                }
+            except Exception as e:
+                return {
+                    "success": False,
+                    "error": f"Marker conversion failed: {str(e)}"
+                }
         
-        return info
+        if returncode != 0:
+            return self._cli_error(stderr)
+        return None
+    
+    def _default_batch_workers(self) -> int:
+        """Model-holding processes (pool workers, batch workers or marker_single runs) that fit in free VRAM, or half the CPU cores."""
+        if self.use_gpu:
+            try:
+                return max(1, _free_vram() // BATCH_WORKER_VRAM)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not query free VRAM, using 1 batch worker: {e}")
+                return 1
+        return max(1, (os.cpu_count() or 2) // 2)
+    
+    def _log_batch_result(self, pdf_path: str, result: Dict[str, Any]):
+        """Log the outcome of one file in a batch conversion."""
+        if result["success"]:
+            logger.info(f"✅ Completed: {Path(pdf_path).name}")
+        else:
+            logger.error(f"❌ Failed: {Path(pdf_path).name} - {result.get('error', 'Unknown error')}")
+    
+    def get_info(self) -> Dict[str, Any]:
+        """Get information about the Marker installation."""
+        # The installation details are read once in __init__
+        return {**self._info, "models_loaded": self.models_loaded}
+
+
+# MarkerOCR instance owned by a convert_multiple worker process
+_worker_ocr: Optional[MarkerOCR] = None
+
+
+def _init_convert_worker(use_gpu: bool, gpu_processes: int = 1):
+    """Create the worker's MarkerOCR once; its models are loaded by the first job."""
+    global _worker_ocr
+    os.environ[GPU_PROCESSES_ENV] = str(gpu_processes)
+    _worker_ocr = MarkerOCR(lazy_load=True, use_gpu=use_gpu, persistent_workers=0)
+
+
+def _convert_worker(pdf_path: str, output_dir: Optional[str], kwargs: Dict[str, Any],
+                    ocr: Optional[MarkerOCR] = None) -> Dict[str, Any]:
+    """Convert one file of a convert_multiple batch with the given or the worker's MarkerOCR."""
+    return (ocr or _worker_ocr).convert_pdf(pdf_path, output_dir, **kwargs)
+
+
+def _serve_worker(use_gpu: bool):
+    """Answer _MarkerWorker jobs from stdin until it closes, with models loaded once."""
+    # Replies get a private copy of stdout; anything Marker prints goes to stderr
+    replies = os.fdopen(os.dup(sys.stdout.fileno()), "wb", buffering=0)
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    
+    ocr = MarkerOCR(lazy_load=False, use_gpu=use_gpu, persistent_workers=0)
+    replies.write(_json_dumps({"ready": ocr.models_loaded}) + b"\n")
+    for line in sys.stdin:
+        result = ocr._convert_with_cli(**json.loads(line))
+        replies.write(_json_dumps(result) + b"\n")
 
 
 def create_sample_pdf():
@@ -906,11 +2326,19 @@ def main():
                        help="Show Marker installation info")
     parser.add_argument("--test", action="store_true", 
                        help="Run a test conversion")
+    parser.add_argument("--cpu", action="store_true",
+                       help="Don't use the GPU")
+    parser.add_argument("--worker", action="store_true",
+                       help="Serve conversion jobs as JSON lines on stdin (persistent worker mode)")
     
     args = parser.parse_args()
     
+    if args.worker:
+        _serve_worker(use_gpu=not args.cpu)
+        return
+    
     # Initialize Marker
-    ocr = MarkerOCR(lazy_load=True)
+    ocr = MarkerOCR(lazy_load=True, use_gpu=not args.cpu)
     
     # Show info
     if args.info:
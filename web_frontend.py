@@ -6,24 +6,36 @@ import os
 import sys
 import logging
 import asyncio
+import atexit
+import errno
+import queue
 import uuid
 import json
 import shutil
 import base64
 import io
-from typing import Dict, Any, Optional, List
+import time
+import functools
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field, fields
+from typing import Dict, Any, Optional, List, Iterator
 from pathlib import Path
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 
 # FastAPI imports
 from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Request, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse, FileResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.exceptions import RequestValidationError
+from starlette.concurrency import run_in_threadpool
 from starlette.responses import JSONResponse as StarletteJSONResponse
 import uvicorn
+import orjson
 
 # Import Marker OCR wrapper
 from marker_wrapper import MarkerOCR
@@ -40,20 +52,10 @@ except ImportError:
 app = FastAPI(
     title="Marker OCR Web Interface",
     description="Advanced document processing with Marker OCR, LLM enhancement, and GPU acceleration",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=ORJSONResponse
 )
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler("logs/web_frontend.log")
-    ]
-)
-logger = logging.getLogger("marker_web")
-
 # Ensure directories exist
 os.makedirs("logs", exist_ok=True)
 os.makedirs("uploads", exist_ok=True)
@@ -61,9 +63,52 @@ os.makedirs("outputs", exist_ok=True)
 os.makedirs("static", exist_ok=True)
 os.makedirs("templates", exist_ok=True)
 
-# Add CORS middleware
+# Setup logging; records are handed to a background listener thread so
+# request handlers never block on console or file writes
+log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+log_listener = QueueListener(
+    log_queue,
+    logging.StreamHandler(sys.stdout),
+    logging.FileHandler("logs/web_frontend.log"),
+    respect_handler_level=True
+)
+# force=True because importing marker_wrapper already configured the root logger
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[QueueHandler(log_queue)],
+    force=True
+)
+log_listener.start()
+atexit.register(log_listener.stop)
+logger = logging.getLogger("marker_web")
+
+
+@dataclass(frozen=True, slots=True)
+class Config:
+    """Settings taken from the environment once at startup."""
+    gpu_available: bool
+
+
+CONFIG = Config(
+    gpu_available=os.environ.get("CUDA_VISIBLE_DEVICES", "0") != ""
+)
+
+
+class StaticExemptCORSMiddleware(CORSMiddleware):
+    """CORSMiddleware that passes requests for static assets straight through."""
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith("/static/"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+# Add CORS middleware; its headers are computed once in __init__, and static
+# assets skip it entirely
 app.add_middleware(
-    CORSMiddleware,
+    StaticExemptCORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
@@ -74,11 +119,292 @@ app.add_middleware(
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
-# Initialize Marker OCR
-ocr_engine = MarkerOCR()
+# Initialize Marker OCR; models load in the background while the app starts
+ocr_engine = MarkerOCR(warmup=True)
+
+# Set once the engine's models are loaded; the lock makes concurrent first
+# requests wait for one load instead of each starting their own
+models_ready = asyncio.Event()
+models_lock = asyncio.Lock()
+
+
+async def ensure_models_loaded() -> bool:
+    """Wait until the OCR engine's models are loaded, loading them off the event loop if needed."""
+    if models_ready.is_set():
+        return True
+    async with models_lock:
+        if not models_ready.is_set():
+            loop = asyncio.get_running_loop()
+            if await loop.run_in_executor(None, ocr_engine.is_ready):
+                models_ready.set()
+    return models_ready.is_set()
+
+
+# Conversions run on their own threads, at most this many at once across all
+# sessions, so they never tie up the event loop or the default executor used
+# for file I/O. They share ocr_engine's models, whose inference MarkerOCR runs
+# one file at a time; the threads overlap the rest of each conversion
+MAX_CONCURRENT_CONVERSIONS = int(os.environ.get("MAX_CONCURRENT_CONVERSIONS", "2"))
+conversion_executor = ThreadPoolExecutor(
+    max_workers=MAX_CONCURRENT_CONVERSIONS, thread_name_prefix="marker-convert"
+)
+
+
+@dataclass(slots=True)
+class FileResult:
+    """Outcome of one file in a processing session; fields that don't apply stay None."""
+    filename: str
+    status: str
+    error: Optional[str] = None
+    method: Optional[str] = None
+    model: Optional[str] = None
+    processing_time: Any = None
+    pages_processed: Any = None
+    output_files: Optional[Dict[str, Optional[str]]] = None
+    file_sizes: Optional[Dict[str, int]] = None
+    size: Optional[int] = None
+    images_extracted: Optional[int] = None
+    text_length: Optional[int] = None
+    metadata: Optional[Dict[str, Any]] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON form, without the fields that don't apply."""
+        return {
+            f.name: getattr(self, f.name)
+            for f in fields(self)
+            if getattr(self, f.name) is not None
+        }
+
+
+@dataclass(slots=True)
+class Session:
+    """Progress and results of a processing session."""
+    status: str
+    total_files: int
+    settings: Dict[str, Any]
+    method: Optional[str] = None
+    processed_files: int = 0
+    files: List[FileResult] = field(default_factory=list)
+    started_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    completed_at: Optional[str] = None
+    failed_at: Optional[str] = None
+    error: Optional[str] = None
+    # Output files by name, for downloads; not part of the status response
+    file_index: Dict[str, str] = field(default_factory=dict)
+    created: float = field(default_factory=time.monotonic)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON form for the status endpoint."""
+        data = {
+            f.name: getattr(self, f.name)
+            for f in fields(self)
+            if f.name not in ("file_index", "created") and getattr(self, f.name) is not None
+        }
+        data["files"] = [file_result.to_dict() for file_result in self.files]
+        return data
+
+
+# In-memory storage for processing sessions, oldest first
+processing_sessions: "OrderedDict[str, Session]" = OrderedDict()
+sessions_lock = asyncio.Lock()
+
+# Sessions are dropped, with their directories, once older than SESSION_TTL
+# seconds or when more than MAX_SESSIONS are tracked, oldest first
+SESSION_TTL = int(os.environ.get("SESSION_TTL", "3600"))
+MAX_SESSIONS = int(os.environ.get("MAX_SESSIONS", "1024"))
+
+
+async def register_session(session_id: str, session: Session):
+    """
+    Start tracking a session, evicting expired sessions and the oldest over MAX_SESSIONS.
+    
+    This is the only place tracked sessions are evicted; sessions still
+    processing never are.
+    """
+    now = time.monotonic()
+    evicted = []
+    async with sessions_lock:
+        for sid in list(processing_sessions):
+            if len(processing_sessions) < MAX_SESSIONS and now - processing_sessions[sid].created < SESSION_TTL:
+                break
+            if forget_session(sid):
+                evicted.append(sid)
+        processing_sessions[session_id] = session
+    
+    if evicted:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, remove_session_dirs, evicted)
+
+
+def forget_session(session_id: str) -> bool:
+    """Stop tracking a session unless it is still processing; returns whether it is untracked."""
+    session = processing_sessions.get(session_id)
+    if session is not None and session.status == "processing":
+        return False
+    processing_sessions.pop(session_id, None)
+    return True
+
+
+def index_session_files(session: Session, paths: List[Optional[str]]):
+    """Record a session's output files by name so downloads find them without searching."""
+    for path in paths:
+        if path:
+            session.file_index[os.path.basename(path)] = str(path)
+
+
+def scan_session_files(project_dir: Path) -> Dict[str, str]:
+    """
+    Index a session directory's files by name.
+    
+    Covers the project directory itself and its documents, images and metadata
+    directories down to one level below them (the document name folders); the
+    first file found with a given name wins.
+    """
+    index: Dict[str, str] = {}
+    
+    def add_files(path, depth: int):
+        subdirs = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        index.setdefault(entry.name, entry.path)
+                    elif depth and entry.is_dir():
+                        subdirs.append(entry.path)
+        except FileNotFoundError:
+            return
+        for subdir in subdirs:
+            add_files(subdir, depth - 1)
+    
+    add_files(project_dir, 0)
+    for subdir in ("documents", "images", "metadata"):
+        add_files(project_dir / subdir, 1)
+    return index
+
+
+def remove_session_dirs(session_ids: List[str]):
+    """Delete evicted sessions' directories."""
+    for session_id in session_ids:
+        shutil.rmtree(Path("outputs") / f"project_{session_id}", ignore_errors=True)
+        logger.info(f"Evicted session {session_id}")
+
+
+# Gemini direct OCR requests in flight at once per session
+GEMINI_CONCURRENCY = int(os.environ.get("GEMINI_CONCURRENCY", "8"))
+
+# Uploads are streamed to disk in chunks of this size (1 MiB)
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+
+# Cleared if linking an O_TMPFILE upload into place fails once (e.g. /proc
+# isn't mounted), after which uploads are written to their names directly
+tmpfile_uploads = hasattr(os, "O_TMPFILE")
+
+
+def write_upload(src, fd: int, size_hint: Optional[int]) -> int:
+    """
+    Write an upload's spooled body to an open file descriptor; returns the number of bytes written.
+    
+    Bodies that spilled to a temporary file are copied by the kernel with
+    copy_file_range where available, so they never pass through Python.
+    """
+    src.seek(0)
+    if size_hint and hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(fd, 0, size_hint)
+        except OSError:
+            pass  # Not supported by this filesystem
+    if getattr(src, "_rolled", False) and hasattr(os, "copy_file_range"):
+        # The spool's unnamed temporary file can't be linked into place
+        # (O_TMPFILE | O_EXCL), but it can be copied without reading it here
+        size = 0
+        try:
+            while copied := os.copy_file_range(src.fileno(), fd, 1 << 30, offset_src=size):
+                size += copied
+            return size
+        except OSError:
+            # Not supported across these filesystems; copy through Python instead
+            os.lseek(fd, 0, os.SEEK_SET)
+            src.seek(0)
+    with open(fd, "wb", closefd=False) as dst:
+        shutil.copyfileobj(src, dst, UPLOAD_CHUNK_SIZE)
+        return dst.tell()
+
+
+def copy_upload(src, destination: Path, size_hint: Optional[int]) -> int:
+    """
+    Copy an upload's spooled body to disk; returns the number of bytes written.
+    
+    Where the filesystem supports O_TMPFILE the body is written to an unnamed
+    file that is linked in as the destination only once complete, so a
+    half-written upload never appears under its name. When the upload's size
+    is known the file is preallocated, so the filesystem reserves its extents
+    in one call rather than growing the file chunk by chunk.
+    """
+    global tmpfile_uploads
+    if tmpfile_uploads:
+        try:
+            fd = os.open(destination.parent, os.O_TMPFILE | os.O_WRONLY, 0o644)
+        except OSError:
+            fd = None  # Not supported by this filesystem
+        if fd is not None:
+            try:
+                size = write_upload(src, fd, size_hint)
+                proc_path = f"/proc/self/fd/{fd}"
+                try:
+                    os.link(proc_path, destination)
+                except FileExistsError:
+                    # Same file name uploaded again; the new upload replaces it
+                    os.unlink(destination)
+                    os.link(proc_path, destination)
+                return size
+            except OSError as e:
+                if isinstance(e, FileExistsError) or e.errno in (errno.ENOSPC, errno.EDQUOT):
+                    raise
+                logger.warning(f"Could not link O_TMPFILE upload, writing uploads directly: {e}")
+                tmpfile_uploads = False
+            finally:
+                os.close(fd)
+    
+    fd = os.open(destination, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        return write_upload(src, fd, size_hint)
+    finally:
+        os.close(fd)
+
+
+async def save_upload(file: UploadFile, destination: Path) -> int:
+    """Save an uploaded file without reading it into memory; returns its size in bytes."""
+    # One worker-thread hop per file rather than one per chunk
+    return await run_in_threadpool(copy_upload, file.file, destination, file.size)
+
+
+async def save_uploads(files: List[UploadFile], directory: Path) -> List[Dict[str, Any]]:
+    """
+    Save a request's uploads into a directory, all at once rather than one after another.
+    
+    Returns:
+        One saved-file record per upload, in the order of files
+    """
+    sizes = await asyncio.gather(*(save_upload(file, directory / file.filename) for file in files))
+    saved_files = []
+    for file, size in zip(files, sizes):
+        saved_files.append({
+            "filename": file.filename,
+            "filepath": str(directory / file.filename),
+            "content_type": file.content_type,
+            "size": size
+        })
+        logger.info(f"Saved file: {file.filename} ({size} bytes)")
+    return saved_files
+
+
+def json_default(obj: Any) -> Any:
+    """Serialize values orjson doesn't handle natively (paths) for session responses."""
+    if isinstance(obj, Path):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
 
-# In-memory storage for processing sessions
-processing_sessions: Dict[str, Dict[str, Any]] = {}
 
 def get_file_extension(output_format: str) -> str:
     """Map output format to appropriate file extension"""
@@ -117,52 +443,18 @@ async def home(request: Request):
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {
+    return ORJSONResponse({
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "marker_available": True,
         "gemini_available": GEMINI_AVAILABLE,
-        "gpu_available": os.environ.get("CUDA_VISIBLE_DEVICES", "0") != ""
-    }
+        "gpu_available": CONFIG.gpu_available
+    })
 
 
-async def process_with_gemini_direct(
-    file_path: str,
-    gemini_api_key: str,
-    gemini_model: str,
-    output_format: str = "markdown"
-) -> Dict[str, Any]:
-    """
-    Process a file directly with Gemini Vision API for OCR.
-    
-    Args:
-        file_path: Path to the image file
-        gemini_api_key: Gemini API key
-        gemini_model: Gemini model name
-        output_format: Output format (markdown, json, html)
-        
-    Returns:
-        Dictionary with processing results
-    """
-    try:
-        if not GEMINI_AVAILABLE:
-            raise Exception("Google Generative AI library not available")
-        
-        # Configure Gemini
-        genai.configure(api_key=gemini_api_key)
-        
-        # Load and process the image
-        start_time = datetime.now()
-        
-        # Open image with PIL
-        image = Image.open(file_path)
-        
-        # Create the model
-        model = genai.GenerativeModel(gemini_model)
-        
-        # Create OCR prompt based on output format
-        if output_format == "json":
-            prompt = """Perform precise OCR on this image. Extract ALL visible text exactly as it appears, maintaining structural integrity and spatial relationships.
+# Gemini direct OCR prompts by output format
+OCR_PROMPTS: Dict[str, str] = {
+    "json": """Perform precise OCR on this image. Extract ALL visible text exactly as it appears, maintaining structural integrity and spatial relationships.
 
 Return a clean JSON object:
 {
@@ -182,9 +474,8 @@ CRITICAL REQUIREMENTS:
 - Preserve all formatting, spacing, and line breaks
 - Do NOT add explanations, interpretations, or additional content
 - Do NOT modify or improve the original text
-- Capture text exactly as written, including any errors or unconventional formatting"""
-        elif output_format == "html":
-            prompt = """Perform precise OCR on this image. Extract ALL visible text exactly as it appears, maintaining structural integrity.
+- Capture text exactly as written, including any errors or unconventional formatting""",
+    "html": """Perform precise OCR on this image. Extract ALL visible text exactly as it appears, maintaining structural integrity.
 
 Format as clean HTML using appropriate semantic tags:
 - <h1>, <h2>, <h3> for headings (match hierarchy)
@@ -198,9 +489,8 @@ CRITICAL REQUIREMENTS:
 - Preserve exact spatial relationships and document structure
 - Return only HTML content (no DOCTYPE, html, or body tags)
 - Do NOT add explanations, interpretations, or additional content
-- Maintain original text exactly as written"""
-        else:  # markdown (default)
-            prompt = """Perform precise OCR on this image. Extract ALL visible text exactly as it appears, maintaining structural integrity and spatial relationships.
+- Maintain original text exactly as written""",
+    "markdown": """Perform precise OCR on this image. Extract ALL visible text exactly as it appears, maintaining structural integrity and spatial relationships.
 
 Format as clean Markdown:
 - # ## ### for headings (match original hierarchy)
@@ -217,13 +507,58 @@ CRITICAL REQUIREMENTS:
 - Do NOT add explanations, interpretations, or additional content beyond the visible text
 - Do NOT modify, correct, or improve the original text
 - Preserve all formatting exactly as it appears in the source document
-- Return ONLY the extracted text in Markdown format - nothing else
-            """
-        
-        # Generate content
+- Return ONLY the extracted text in Markdown format - nothing else""",
+}
+
+
+@functools.lru_cache(maxsize=32)
+def get_gemini_model(api_key: str, model_name: str):
+    """Gemini model handle for an API key, reused across requests and files."""
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(model_name)
+
+
+def gemini_ocr_text(file_path: str, gemini_api_key: str, gemini_model: str, prompt: str) -> str:
+    """Run a blocking Gemini OCR request for one image; call from a worker thread."""
+    with Image.open(file_path) as image:
+        model = get_gemini_model(gemini_api_key, gemini_model)
         response = model.generate_content([prompt, image])
+        return response.text
+
+
+async def process_with_gemini_direct(
+    file_path: str,
+    gemini_api_key: str,
+    gemini_model: str,
+    output_format: str = "markdown"
+) -> Dict[str, Any]:
+    """
+    Process a file directly with Gemini Vision API for OCR.
+    
+    Args:
+        file_path: Path to the image file
+        gemini_api_key: Gemini API key
+        gemini_model: Gemini model name
+        output_format: Output format (markdown, json, html)
+        
+    Returns:
+        Dictionary with processing results
+    """
+    try:
+        if not GEMINI_AVAILABLE:
+            raise Exception("Google Generative AI library not available")
+        
+        # Load and process the image
+        start_time = datetime.now()
+        
+        # OCR prompt for the output format, markdown by default
+        prompt = OCR_PROMPTS.get(output_format, OCR_PROMPTS["markdown"])
         
-        if not response.text:
+        # Generate content; image decoding and the API call block, so they run
+        # in a worker thread and leave the event loop free for other requests
+        text = await asyncio.to_thread(gemini_ocr_text, file_path, gemini_api_key, gemini_model, prompt)
+        
+        if not text:
             raise Exception("No text extracted from image")
         
         # Calculate processing time
@@ -233,8 +568,8 @@ CRITICAL REQUIREMENTS:
         # Return results in Marker-compatible format
         return {
             "success": True,
-            "text": response.text,
-            "text_length": len(response.text),
+            "text": text,
+            "text_length": len(text),
             "processing_time": processing_time,
             "pages_processed": 1,
             "method": "gemini_direct",
@@ -244,7 +579,7 @@ CRITICAL REQUIREMENTS:
                 "method": "Gemini Direct OCR",
                 "model": gemini_model,
                 "processing_time": processing_time,
-                "text_length": len(response.text)
+                "text_length": len(text)
             }
         }
         
@@ -277,12 +612,12 @@ async def test_upload(
             file_info.append(info)
             logger.info(f"File: {info}")
         
-        return {
+        return ORJSONResponse({
             "success": True,
             "files_count": len(files),
             "files": file_info,
             "test_param": test_param
-        }
+        })
     except Exception as e:
         logger.error(f"Test upload error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -339,37 +674,24 @@ async def gemini_direct_ocr(
         images_dir.mkdir(exist_ok=True)
         metadata_dir.mkdir(exist_ok=True)
         
+        # Save uploaded files first, while the file handles are still open,
+        # then process in background. The session is registered only once they
+        # are saved: if saving fails it is never left "processing", which
+        # eviction and DELETE both refuse to touch
+        saved_files = await save_uploads(files, images_dir)  # Save to images directory
+        
         # Initialize session data
-        processing_sessions[session_id] = {
-            "status": "processing",
-            "total_files": len(files),
-            "processed_files": 0,
-            "files": [],
-            "started_at": datetime.now().isoformat(),
-            "method": "gemini_direct",
-            "settings": {
+        await register_session(session_id, Session(
+            status="processing",
+            total_files=len(files),
+            method="gemini_direct",
+            settings={
                 "output_format": output_format,
                 "method": "gemini_direct",
                 "gemini_model": gemini_model,
                 "gemini_api_key": "***"
             }
-        }
-        
-        # Save uploaded files first, then process in background
-        saved_files = []
-        for file in files:
-            # Save file immediately while the file handle is still open
-            input_file = images_dir / file.filename  # Save to images directory
-            with open(input_file, "wb") as f:
-                content = await file.read()
-                f.write(content)
-            saved_files.append({
-                "filename": file.filename,
-                "filepath": str(input_file),
-                "content_type": file.content_type,
-                "size": len(content)
-            })
-            logger.info(f"Saved file: {file.filename} ({len(content)} bytes)")
+        ))
         
         # Process saved files in background with Gemini direct
         background_tasks.add_task(
@@ -386,12 +708,12 @@ async def gemini_direct_ocr(
         
         logger.info(f"Started Gemini direct processing session {session_id} with {len(files)} files")
         
-        return JSONResponse(content={
+        return ORJSONResponse({
             "success": True,
             "session_id": session_id,
             "method": "gemini_direct",
             "message": f"Processing {len(files)} file(s) with Gemini Direct OCR (session {session_id})",
-            "settings": processing_sessions[session_id]["settings"]
+            "settings": processing_sessions[session_id].settings
         })
     
     except Exception as e:
@@ -466,14 +788,17 @@ async def upload_files(
         images_dir.mkdir(exist_ok=True)
         metadata_dir.mkdir(exist_ok=True)
         
+        # Save uploaded files first, while the file handles are still open,
+        # then process in background. The session is registered only once they
+        # are saved: if saving fails it is never left "processing", which
+        # eviction and DELETE both refuse to touch
+        saved_files = await save_uploads(files, documents_dir)
+        
         # Initialize session data
-        processing_sessions[session_id] = {
-            "status": "processing",
-            "total_files": len(files),
-            "processed_files": 0,
-            "files": [],
-            "started_at": datetime.now().isoformat(),
-            "settings": {
+        await register_session(session_id, Session(
+            status="processing",
+            total_files=len(files),
+            settings={
                 "output_format": output_format,
                 "use_llm": use_llm,
                 "llm_provider": llm_provider,
@@ -484,23 +809,7 @@ async def upload_files(
                 "gemini_api_key": "***" if gemini_api_key else "",
                 "gemini_model": gemini_model
             }
-        }
-        
-        # Save uploaded files first, then process in background
-        saved_files = []
-        for file in files:
-            # Save file immediately while the file handle is still open
-            input_file = documents_dir / file.filename
-            with open(input_file, "wb") as f:
-                content = await file.read()
-                f.write(content)
-            saved_files.append({
-                "filename": file.filename,
-                "filepath": str(input_file),
-                "content_type": file.content_type,
-                "size": len(content)
-            })
-            logger.info(f"Saved file: {file.filename} ({len(content)} bytes)")
+        ))
         
         # Process saved files in background
         background_tasks.add_task(
@@ -524,11 +833,11 @@ async def upload_files(
         
         logger.info(f"Started processing session {session_id} with {len(files)} files")
         
-        return JSONResponse(content={
+        return ORJSONResponse({
             "success": True,
             "session_id": session_id,
             "message": f"Processing {len(files)} file(s) with session {session_id}",
-            "settings": processing_sessions[session_id]["settings"]
+            "settings": processing_sessions[session_id].settings
         })
     
     except Exception as e:
@@ -554,49 +863,60 @@ async def process_files_background(
     gemini_model: str
 ):
     """Background task to process uploaded files."""
+    session = processing_sessions[session_id]
     try:
         processed_files = []
         
-        for i, file_info in enumerate(saved_files):
+        # Configure processing options with organized output paths, shared by
+        # every file of the session
+        processing_options = {
+            "output_dir": str(documents_dir),  # Output to documents directory
+            "output_format": output_format,  # Only generate this format
+            "extract_images": extract_images,  # extract_images is already a boolean in this function
+            "max_pages": max_pages,
+            "images_dir": str(images_dir),  # Extract images to images directory
+            "organized_output": True,  # Enable organized output structure
+            "return_text": False  # Results only point at the output files
+        }
+        
+        # Log the actual extract_images value to verify it's correct
+        logger.info(f"Processing {len(saved_files)} file(s) with extract_images={extract_images}")
+        
+        # Add LLM options if enabled
+        if use_llm:
+            processing_options["use_llm"] = True
+            
+            if llm_provider == "gemini":
+                processing_options.update({
+                    "llm_service": "marker.services.gemini.GoogleGeminiService",
+                    "gemini_api_key": gemini_api_key,
+                    "gemini_model": gemini_model
+                })
+            else:  # Default to Ollama
+                processing_options.update({
+                    "llm_service": "marker.services.ollama.OllamaService",
+                    "ollama_base_url": ollama_url,
+                    "ollama_model": ollama_model
+                })
+        
+        # Process with Marker OCR, a few files at a time; each result is
+        # recorded as soon as it's ready. Session updates run on the event loop
+        # between awaits, so they need no lock
+        if not await ensure_models_loaded():
+            logger.warning("Marker models are not loaded; conversions will report the error")
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_CONVERSIONS)
+        
+        async def process_one(i: int, file_info: Dict[str, str]):
+            filename = file_info["filename"]
+            filepath = file_info["filepath"]
             try:
-                filename = file_info["filename"]
-                filepath = file_info["filepath"]
-                
-                logger.info(f"Processing file {i+1}/{len(saved_files)}: {filename}")
-                
-                # Configure processing options with organized output paths
-                processing_options = {
-                    "pdf_path": filepath,
-                    "output_dir": str(documents_dir),  # Output to documents directory
-                    "output_format": output_format,  # Only generate this format
-                    "extract_images": extract_images,  # extract_images is already a boolean in this function
-                    "max_pages": max_pages,
-                    "images_dir": str(images_dir),  # Extract images to images directory
-                    "organized_output": True  # Enable organized output structure
-                }
-                
-                # Log the actual extract_images value to verify it's correct
-                logger.info(f"Processing {filename} with extract_images={extract_images}")
-                
-                # Add LLM options if enabled
-                if use_llm:
-                    processing_options["use_llm"] = True
-                    
-                    if llm_provider == "gemini":
-                        processing_options.update({
-                            "llm_service": "marker.services.gemini.GoogleGeminiService",
-                            "gemini_api_key": gemini_api_key,
-                            "gemini_model": gemini_model
-                        })
-                    else:  # Default to Ollama
-                        processing_options.update({
-                            "llm_service": "marker.services.ollama.OllamaService",
-                            "ollama_base_url": ollama_url,
-                            "ollama_model": ollama_model
-                        })
-                
-                # Process with Marker OCR
-                result = ocr_engine.convert_pdf(**processing_options)
+                async with semaphore:
+                    logger.info(f"Processing file {i+1}/{len(saved_files)}: {filename}")
+                    result = await loop.run_in_executor(
+                        conversion_executor,
+                        functools.partial(ocr_engine.convert_pdf, filepath, **processing_options)
+                    )
                 
                 if result['success']:
                     # Get file size information
@@ -616,70 +936,64 @@ async def process_files_background(
                     # Get the original file size for reference
                     original_size = Path(filepath).stat().st_size
                     
-                    file_result = {
-                        "filename": filename,
-                        "status": "completed",
-                        "processing_time": result.get('processing_time', 'N/A'),
-                        "pages_processed": result.get('pages_processed', 'N/A'),
-                        "output_files": {
+                    file_result = FileResult(
+                        filename=filename,
+                        status="completed",
+                        processing_time=result.get('processing_time', 'N/A'),
+                        pages_processed=result.get('pages_processed', 'N/A'),
+                        output_files={
                             "markdown": result.get('markdown_file'),
                             "json": result.get('json_file'),
                             "html": result.get('html_file') if not (result.get('html_file', '').endswith('_temp.html')) else None,
                             "pdf": result.get('pdf_file')
                         },
-                        "file_sizes": file_sizes,
-                        "size": original_size,
-                        "images_extracted": len(result.get('images', [])),
-                        "metadata": result.get('metadata', {})
-                    }
+                        file_sizes=file_sizes,
+                        size=original_size,
+                        images_extracted=len(result.get('images', [])),
+                        metadata=result.get('metadata', {})
+                    )
                     processed_files.append(file_result)
-                    
-                    # Update session progress
-                    processing_sessions[session_id]["processed_files"] = i + 1
-                    processing_sessions[session_id]["files"] = processed_files
+                    index_session_files(
+                        session,
+                        [*file_result.output_files.values(), *result.get('images', [])]
+                    )
                     
                     logger.info(f"Successfully processed {filename}")
                 else:
-                    error_info = {
-                        "filename": filename,
-                        "status": "failed",
-                        "error": result.get('error', 'Unknown error')
-                    }
+                    error_info = FileResult(
+                        filename=filename,
+                        status="failed",
+                        error=result.get('error', 'Unknown error')
+                    )
                     processed_files.append(error_info)
                     logger.error(f"Failed to process {filename}: {result.get('error')}")
             
             except Exception as e:
-                error_info = {
-                    "filename": filename,
-                    "status": "failed",
-                    "error": str(e)
-                }
+                error_info = FileResult(
+                    filename=filename,
+                    status="failed",
+                    error=str(e)
+                )
                 processed_files.append(error_info)
                 logger.error(f"Error processing {filename}: {str(e)}")
+            
+            # Update session progress
+            session.processed_files = len(processed_files)
+            session.files = processed_files
+        
+        await asyncio.gather(*(process_one(i, file_info) for i, file_info in enumerate(saved_files)))
         
         # Update session status
-        processing_sessions[session_id].update({
-            "status": "completed",
-            "completed_at": datetime.now().isoformat(),
-            "files": processed_files
-        })
+        session.status = "completed"
+        session.completed_at = datetime.now().isoformat()
+        session.files = processed_files
         
         logger.info(f"Completed processing session {session_id}")
-        
-        # Run cleanup to prevent accumulation of old files
-        # This happens in the background after each successful processing
-        # Keep only the 5 most recent sessions
-        try:
-            cleanup_old_outputs(keep_recent=5)
-        except Exception as cleanup_error:
-            logger.warning(f"Auto-cleanup after processing failed: {cleanup_error}")
     
     except Exception as e:
-        processing_sessions[session_id].update({
-            "status": "failed",
-            "error": str(e),
-            "failed_at": datetime.now().isoformat()
-        })
+        session.status = "failed"
+        session.error = str(e)
+        session.failed_at = datetime.now().isoformat()
         logger.error(f"Background processing failed for session {session_id}: {str(e)}")
 
 
@@ -694,29 +1008,36 @@ async def process_gemini_direct_background(
     gemini_model: str
 ):
     """Background task to process files with Gemini Direct OCR."""
+    session = processing_sessions[session_id]
     try:
         processed_files = []
-        
-        for i, file_info in enumerate(saved_files):
+        # Files currently with Gemini, listed in the session as "processing"
+        in_progress: Dict[int, FileResult] = {}
+        semaphore = asyncio.Semaphore(GEMINI_CONCURRENCY)
+        
+        # Files are sent to Gemini concurrently, up to GEMINI_CONCURRENCY at a
+        # time; session updates run on the event loop between awaits
+        async def process_one(i: int, file_info: Dict[str, str]):
+            filename = file_info["filename"]
+            filepath = file_info["filepath"]
             try:
-                filename = file_info["filename"]
-                filepath = file_info["filepath"]
-                
-                logger.info(f"Processing file {i+1}/{len(saved_files)} with Gemini Direct: {filename}")
-                
-                # Update file status to processing
-                processing_sessions[session_id]["files"] = processed_files + [{
-                    "filename": filename,
-                    "status": "processing"
-                }]
-                
-                # Process with Gemini Direct OCR
-                result = await process_with_gemini_direct(
-                    filepath,
-                    gemini_api_key,
-                    gemini_model,
-                    output_format
-                )
+                async with semaphore:
+                    logger.info(f"Processing file {i+1}/{len(saved_files)} with Gemini Direct: {filename}")
+                    
+                    # Update file status to processing
+                    in_progress[i] = FileResult(filename=filename, status="processing")
+                    session.files = processed_files + list(in_progress.values())
+                    
+                    # Process with Gemini Direct OCR
+                    try:
+                        result = await process_with_gemini_direct(
+                            filepath,
+                            gemini_api_key,
+                            gemini_model,
+                            output_format
+                        )
+                    finally:
+                        del in_progress[i]
                 
                 if result['success']:
                     # Create output file in documents directory with proper extension
@@ -733,70 +1054,62 @@ async def process_gemini_direct_background(
                     with open(metadata_file, 'w', encoding='utf-8') as f:
                         json.dump(result['metadata'], f, indent=2)
                     
-                    file_result = {
-                        "filename": filename,
-                        "status": "completed",
-                        "processing_time": result.get('processing_time', 'N/A'),
-                        "pages_processed": result.get('pages_processed', 1),
-                        "method": "gemini_direct",
-                        "model": result.get('model', gemini_model),
-                        "output_files": {
+                    file_result = FileResult(
+                        filename=filename,
+                        status="completed",
+                        processing_time=result.get('processing_time', 'N/A'),
+                        pages_processed=result.get('pages_processed', 1),
+                        method="gemini_direct",
+                        model=result.get('model', gemini_model),
+                        output_files={
                             output_format: str(output_file),
                             "metadata": str(metadata_file)
                         },
-                        "text_length": result.get('text_length', 0),
-                        "metadata": result.get('metadata', {})
-                    }
+                        text_length=result.get('text_length', 0),
+                        metadata=result.get('metadata', {})
+                    )
                     processed_files.append(file_result)
+                    index_session_files(session, list(file_result.output_files.values()))
                     
                     # Update session progress
-                    processing_sessions[session_id]["processed_files"] = i + 1
-                    processing_sessions[session_id]["files"] = processed_files
+                    session.processed_files += 1
                     
                     logger.info(f"Successfully processed {filename} with Gemini Direct OCR")
                 else:
-                    error_info = {
-                        "filename": filename,
-                        "status": "failed",
-                        "method": "gemini_direct",
-                        "error": result.get('error', 'Unknown error')
-                    }
+                    error_info = FileResult(
+                        filename=filename,
+                        status="failed",
+                        method="gemini_direct",
+                        error=result.get('error', 'Unknown error')
+                    )
                     processed_files.append(error_info)
                     logger.error(f"Failed to process {filename} with Gemini Direct: {result.get('error')}")
             
             except Exception as e:
-                error_info = {
-                    "filename": filename,
-                    "status": "failed",
-                    "method": "gemini_direct",
-                    "error": str(e)
-                }
+                error_info = FileResult(
+                    filename=filename,
+                    status="failed",
+                    method="gemini_direct",
+                    error=str(e)
+                )
                 processed_files.append(error_info)
                 logger.error(f"Error processing {filename} with Gemini Direct: {str(e)}")
+            
+            session.files = processed_files + list(in_progress.values())
+        
+        await asyncio.gather(*(process_one(i, file_info) for i, file_info in enumerate(saved_files)))
         
         # Update session status
-        processing_sessions[session_id].update({
-            "status": "completed",
-            "completed_at": datetime.now().isoformat(),
-            "files": processed_files
-        })
+        session.status = "completed"
+        session.completed_at = datetime.now().isoformat()
+        session.files = processed_files
         
         logger.info(f"Completed Gemini Direct processing session {session_id}")
-        
-        # Run cleanup to prevent accumulation of old files
-        # This happens in the background after each successful processing
-        # Keep only the 5 most recent sessions
-        try:
-            cleanup_old_outputs(keep_recent=5)
-        except Exception as cleanup_error:
-            logger.warning(f"Auto-cleanup after processing failed: {cleanup_error}")
     
     except Exception as e:
-        processing_sessions[session_id].update({
-            "status": "failed",
-            "error": str(e),
-            "failed_at": datetime.now().isoformat()
-        })
+        session.status = "failed"
+        session.error = str(e)
+        session.failed_at = datetime.now().isoformat()
         logger.error(f"Gemini Direct background processing failed for session {session_id}: {str(e)}")
 
 
@@ -806,7 +1119,11 @@ async def get_session_status(session_id: str):
     if session_id not in processing_sessions:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    return JSONResponse(content=processing_sessions[session_id])
+    # Serialized straight to bytes, skipping FastAPI's encoder pass over every file record
+    return Response(
+        content=orjson.dumps(processing_sessions[session_id].to_dict(), default=json_default),
+        media_type="application/json"
+    )
 
 
 @app.get("/api/sessions/{session_id}/download/{filename}")
@@ -815,55 +1132,23 @@ async def download_file(session_id: str, filename: str):
     try:
         project_dir = Path("outputs") / f"project_{session_id}"
         
-        # Check if we can get the file path directly from the session data first
+        # Look the file up in the session's index of outputs first
         # This avoids searching the filesystem entirely when possible
         file_path = None
-        if session_id in processing_sessions:
-            session_data = processing_sessions[session_id]
-            # Try to find the file in the session's file outputs
-            for file_info in session_data.get("files", []):
-                if file_info.get("status") == "completed" and file_info.get("output_files"):
-                    # Check each output type for the requested filename
-                    for output_type, output_path in file_info["output_files"].items():
-                        if output_path and output_path.endswith("/" + filename):
-                            file_path = Path(output_path)
-                            break
-                    if file_path:
-                        break
+        session = processing_sessions.get(session_id)
+        if session is not None and filename in session.file_index:
+            file_path = Path(session.file_index[filename])
         
-        # If not found in session data, try specific locations instead of full recursive search
+        # Otherwise index the session directory in one scandir pass, and keep
+        # the result so later downloads from this session skip the scan
         if not file_path:
-            # Check specific likely locations in order of probability
-            potential_paths = [
-                project_dir / filename,                                 # Direct in project dir
-                project_dir / "documents" / filename,                   # In documents dir
-                project_dir / "documents" / Path(filename).stem / filename,  # In document-specific subdir
-                project_dir / "images" / filename,                      # In images dir
-                project_dir / "metadata" / filename                     # In metadata dir
-            ]
-            
-            for path in potential_paths:
-                if path.exists() and path.is_file():
-                    file_path = path
-                    break
-                    
-            # Only if still not found, do a targeted search in specific directories
-            if not file_path:
-                for subdir in ["documents", "images", "metadata"]:
-                    dir_path = project_dir / subdir
-                    if dir_path.exists():
-                        # First check immediate files in this directory
-                        if (dir_path / filename).exists():
-                            file_path = dir_path / filename
-                            break
-                        # Then check one level down only (document name folders)
-                        for doc_dir in dir_path.iterdir():
-                            if doc_dir.is_dir():
-                                if (doc_dir / filename).exists():
-                                    file_path = doc_dir / filename
-                                    break
-                        if file_path:
-                            break
+            loop = asyncio.get_running_loop()
+            found = await loop.run_in_executor(None, scan_session_files, project_dir)
+            if session is not None:
+                for name, path in found.items():
+                    session.file_index.setdefault(name, path)
+            if filename in found:
+                file_path = Path(found[filename])
         
         # Log the search result
         logger.info(f"Download request for '{filename}' in session {session_id}")
@@ -884,12 +1169,58 @@ async def download_file(session_id: str, filename: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Text outputs are deflated in ZIP downloads; images are already compressed
+ZIP_DEFLATE_SUFFIXES = {".md", ".json", ".html", ".txt"}
+
+
+class ZipChunkBuffer:
+    """Write-only file object that collects ZIP output until it is taken."""
+    
+    def __init__(self):
+        self.chunks: List[bytes] = []
+    
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def take(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def iter_zip(files: List[Path], base_dir: Path) -> Iterator[bytes]:
+    """
+    Build a ZIP archive of files on the fly, yielding it in chunks.
+    
+    Archive paths are relative to base_dir. Nothing is written to disk; the
+    output is not seekable, so zipfile writes data descriptors after each entry.
+    """
+    buffer = ZipChunkBuffer()
+    with zipfile.ZipFile(buffer, "w") as zipf:
+        for file_path in files:
+            info = zipfile.ZipInfo.from_file(file_path, file_path.relative_to(base_dir))
+            if file_path.suffix.lower() in ZIP_DEFLATE_SUFFIXES:
+                info.compress_type = zipfile.ZIP_DEFLATED
+            else:
+                info.compress_type = zipfile.ZIP_STORED
+            with open(file_path, "rb") as src, zipf.open(info, "w") as dst:
+                while chunk := src.read(UPLOAD_CHUNK_SIZE):
+                    dst.write(chunk)
+                    if buffer.chunks:
+                        yield buffer.take()
+        if buffer.chunks:
+            yield buffer.take()
+    # Central directory, written on close
+    yield buffer.take()
+
+
 @app.get("/api/sessions/{session_id}/download-all")
 async def download_all_files(session_id: str):
     """Download all processed files as a ZIP archive."""
-    import zipfile
-    import tempfile
-    
     try:
         project_dir = Path("outputs") / f"project_{session_id}"
         
@@ -904,10 +1235,10 @@ async def download_all_files(session_id: str):
         if session_id in processing_sessions:
             session_data = processing_sessions[session_id]
             
-            for file_info in session_data.get("files", []):
-                if file_info.get("status") == "completed" and file_info.get("output_files"):
+            for file_info in session_data.files:
+                if file_info.status == "completed" and file_info.output_files:
                     # Add all output files from this file
-                    for output_type, output_path in file_info["output_files"].items():
+                    for output_type, output_path in file_info.output_files.items():
                         if output_path:
                             file_path = Path(output_path)
                             if file_path.exists() and file_path.is_file():
@@ -930,25 +1261,15 @@ async def download_all_files(session_id: str):
                     if file_path.is_file():
                         files_to_include.append(file_path)
         
-        # Create a temporary ZIP file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.zip') as temp_zip:
-            with zipfile.ZipFile(temp_zip.name, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                # Add all found files to the zip
-                for file_path in files_to_include:
-                    # Create archive path relative to project directory
-                    archive_path = file_path.relative_to(project_dir)
-                    zipf.write(file_path, archive_path)
-                    
-                # Log how many files were included
-                logger.info(f"Added {len(files_to_include)} files to ZIP archive for session {session_id}")
-            
-            # Return the ZIP file
-            return FileResponse(
-                path=temp_zip.name,
-                filename=f"ocr-results-{session_id}.zip",
-                media_type='application/zip',
-                background=None  # Let the file be cleaned up by the OS
-            )
+        logger.info(f"Streaming {len(files_to_include)} files as a ZIP archive for session {session_id}")
+        
+        # Stream the archive as it is built instead of writing a temporary ZIP first;
+        # Starlette runs the generator in its thread pool
+        return StreamingResponse(
+            iter_zip(files_to_include, project_dir),
+            media_type="application/zip",
+            headers={"Content-Disposition": f'attachment; filename="ocr-results-{session_id}.zip"'}
+        )
     
     except Exception as e:
         logger.error(f"Error creating bulk download: {str(e)}")
@@ -958,15 +1279,17 @@ async def download_all_files(session_id: str):
 @app.delete("/api/sessions/{session_id}")
 async def cleanup_session(session_id: str):
     """Clean up session files and data."""
+    # A session's files can't be removed while it is still converting them
+    async with sessions_lock:
+        if not forget_session(session_id):
+            raise HTTPException(status_code=409, detail="Session is still processing")
+    
     try:
         project_dir = Path("outputs") / f"project_{session_id}"
         
         if project_dir.exists():
-            import shutil
-            shutil.rmtree(project_dir)
-        
-        if session_id in processing_sessions:
-            del processing_sessions[session_id]
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, shutil.rmtree, project_dir)
         
         logger.info(f"Cleaned up session {session_id}")
         return {"message": f"Session {session_id} cleaned up successfully"}
@@ -979,57 +1302,95 @@ async def cleanup_session(session_id: str):
 @app.get("/api/sessions")
 async def list_sessions():
     """List all active sessions."""
-    return JSONResponse(content={
+    return ORJSONResponse({
         "sessions": list(processing_sessions.keys()),
         "total": len(processing_sessions)
     })
 
 
+# Supported formats and features; fixed for the life of the process, so the
+# response is serialized once at import
+SUPPORTED_FORMATS = {
+    "input_formats": {
+        "pdf": "PDF documents (recommended)",
+        "images": ["JPEG", "PNG", "WebP", "TIFF", "BMP"],
+        "office": ["DOCX", "PPTX", "XLSX"],
+        "ebooks": ["EPUB", "MOBI"],
+        "web": ["HTML"]
+    },
+    "output_formats": {
+        "markdown": "Clean markdown with preserved structure",
+        "json": "Structured JSON with metadata",
+        "html": "HTML with styling and formatting"
+    },
+    "llm_features": {
+        "layout_enhancement": "Improved layout detection",
+        "table_processing": "Better table recognition",
+        "equation_processing": "Enhanced mathematical content",
+        "image_descriptions": "AI-generated image descriptions"
+    },
+    "gpu_support": CONFIG.gpu_available
+}
+_FORMATS_JSON = orjson.dumps(SUPPORTED_FORMATS)
+
+
 @app.get("/api/formats")
 async def get_supported_formats():
     """Get information about supported formats and features."""
-    return {
-        "input_formats": {
-            "pdf": "PDF documents (recommended)",
-            "images": ["JPEG", "PNG", "WebP", "TIFF", "BMP"],
-            "office": ["DOCX", "PPTX", "XLSX"],
-            "ebooks": ["EPUB", "MOBI"],
-            "web": ["HTML"]
-        },
-        "output_formats": {
-            "markdown": "Clean markdown with preserved structure",
-            "json": "Structured JSON with metadata",
-            "html": "HTML with styling and formatting"
-        },
-        "llm_features": {
-            "layout_enhancement": "Improved layout detection",
-            "table_processing": "Better table recognition",
-            "equation_processing": "Enhanced mathematical content",
-            "image_descriptions": "AI-generated image descriptions"
-        },
-        "gpu_support": os.environ.get("CUDA_VISIBLE_DEVICES", "0") != ""
-    }
+    return Response(content=_FORMATS_JSON, media_type="application/json")
+
+
+def latest_file_mtime(path: str) -> Optional[float]:
+    """
+    Most recent modification time of the files below a directory, or None if it has none.
+    
+    Walks with os.scandir so each entry's type comes from the directory
+    listing and each file is stat'ed once.
+    """
+    latest = None
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                mtime = latest_file_mtime(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                mtime = entry.stat(follow_symlinks=False).st_mtime
+            else:
+                continue
+            if mtime is not None and (latest is None or mtime > latest):
+                latest = mtime
+    return latest
 
 
 def cleanup_old_outputs(keep_recent=3):
     """
     Clean up old output files and directories.
     
+    Directories of sessions still tracked in processing_sessions are left
+    alone; register_session evicts those, and never while they are processing.
+    Blocking; callers on the event loop run it in the executor.
+    
     Args:
-        keep_recent: Number of most recent project directories to keep
+        keep_recent: Number of most recent untracked project directories to keep
     """
     try:
         outputs_dir = Path("outputs")
         if not outputs_dir.exists():
             return
         
-        # Get all project directories with their modification times
+        # Copying the keys is a single C call, so this is safe from a worker thread
+        tracked = set(processing_sessions)
+        
+        # Get all untracked project directories with their modification times
         project_dirs = []
         for item in outputs_dir.iterdir():
             if item.is_dir() and (item.name.startswith("session_") or item.name.startswith("project_")):
+                if item.name.replace('project_', '').replace('session_', '') in tracked:
+                    continue
                 try:
                     # Get the most recent file modification time in this directory
-                    most_recent_time = max((f.stat().st_mtime for f in item.rglob("*") if f.is_file()), default=item.stat().st_mtime)
+                    most_recent_time = latest_file_mtime(str(item))
+                    if most_recent_time is None:
+                        most_recent_time = item.stat().st_mtime
                     project_dirs.append((item, most_recent_time))
                 except Exception as e:
                     logger.warning(f"Error getting modification time for {item.name}: {e}")
@@ -1038,11 +1399,19 @@ def cleanup_old_outputs(keep_recent=3):
         # Sort by modification time (newest first)
         project_dirs.sort(key=lambda x: x[1], reverse=True)
         
-        # Keep the most recent directories, remove the rest
-        for i, (item, mtime) in enumerate(project_dirs):
-            if i >= keep_recent:
-                logger.info(f"Cleaning up project directory: {item.name}")
-                shutil.rmtree(item)
+        # Keep the most recent directories, remove the rest in parallel; one
+        # that can't be removed doesn't stop the others
+        stale_dirs = [item for item, mtime in project_dirs[keep_recent:]]
+        if stale_dirs:
+            with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1, len(stale_dirs))) as executor:
+                futures = {executor.submit(shutil.rmtree, item): item for item in stale_dirs}
+                for future in as_completed(futures):
+                    item = futures[future]
+                    try:
+                        future.result()
+                        logger.info(f"Cleaned up project directory: {item.name}")
+                    except Exception as e:
+                        logger.warning(f"Error removing project directory {item.name}: {e}")
         
         # Remove any files in the outputs directory
         for item in outputs_dir.iterdir():
@@ -1050,16 +1419,10 @@ def cleanup_old_outputs(keep_recent=3):
                 logger.info(f"Cleaning up file: {item.name}")
                 item.unlink()
         
-        # Clear in-memory sessions for removed directories
-        kept_session_ids = {dir_item[0].name.replace('project_', '').replace('session_', '') 
-                           for dir_item in project_dirs[:keep_recent]}
-        
-        removed_sessions = set(processing_sessions.keys()) - kept_session_ids
-        for session_id in removed_sessions:
-            if session_id in processing_sessions:
-                del processing_sessions[session_id]
-        
-        logger.info(f"✅ Output cleanup completed. Kept {min(keep_recent, len(project_dirs))} recent sessions.")
+        logger.info(
+            f"✅ Output cleanup completed. Kept {min(keep_recent, len(project_dirs))} recent sessions; "
+            f"left {len(tracked)} tracked sessions alone."
+        )
         
     except Exception as e:
         logger.error(f"❌ Cleanup failed: {str(e)}")
@@ -1069,7 +1432,9 @@ def cleanup_old_outputs(keep_recent=3):
 async def manual_cleanup():
     """Manually trigger cleanup of output files."""
     try:
-        cleanup_old_outputs()
+        # The sweep walks and deletes directory trees, so keep it off the event loop
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, cleanup_old_outputs)
         return {"success": True, "message": "Output files cleaned up successfully"}
     except Exception as e:
         logger.error(f"Manual cleanup failed: {str(e)}")
@@ -1081,11 +1446,15 @@ if __name__ == "__main__":
     logger.info("🧹 Performing startup cleanup...")
     cleanup_old_outputs()
     
-    # Run the web application
+    # Run the web application; uvloop and httptools come with uvicorn[standard].
+    # One worker: sessions and the loaded models live in this process
     uvicorn.run(
         "web_frontend:app",
         host="0.0.0.0",
         port=8100,
         reload=False,
-        log_level="info"
+        log_level="info",
+        loop="uvloop",
+        http="httptools",
+        workers=1
     )
\ No newline at end of file